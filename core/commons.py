@@ -1,7 +1,11 @@
 # Version: 1.1
 import os
 import sys
+import atexit
+import queue
 import logging
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 
 import flet as ft
@@ -27,14 +31,25 @@ os.makedirs(LOG_DIR, exist_ok=True)
 LOG_FILE_PATH = os.path.join(LOG_DIR, "app.log")
 
 # ログ設定：コンソールとファイルの両方に出力
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),               # コンソール出力
-        logging.FileHandler(LOG_FILE_PATH, encoding='utf-8')  # ファイル出力(output/app.log)
-    ]
-)
+# 呼び出し元スレッドはキューへの投入のみ行い、実際の書き込みはリスナースレッドが担当する
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_log_targets = [
+    logging.StreamHandler(sys.stdout),               # コンソール出力
+    logging.FileHandler(LOG_FILE_PATH, encoding='utf-8')  # ファイル出力(output/app.log)
+]
+for _handler in _log_targets:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.Queue(-1)
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s')) # 書式の適用はリスナー側で行う
+
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+
+_log_listener = QueueListener(_log_queue, *_log_targets, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop) # 終了時に未出力のログを書き出す
+
 logger = logging.getLogger(__name__)
 
 
@@ -68,9 +83,15 @@ except ImportError as e:
     class ScheduleHandler: # Mock
         def __enter__(self): return self
         def __exit__(self, exc_type, exc_val, exc_tb): pass
+        def close(self): pass
         def login(self, i, p): return False, "モジュール未ロード"
     def run_main_logic(*args): return False, {"error": "モジュール未ロード"}
 
+@lru_cache(maxsize=32)
+def decrypt_cached(ciphertext: str) -> str:
+    """decrypt の結果を暗号文ごとにキャッシュします (画面の再生成のたびに復号し直さないため)。"""
+    return decrypt(ciphertext)
+
 try:
     from icon_data import APP_ICON_BASE64
 except ImportError:
@@ -81,12 +102,15 @@ class FletStatusPlaceholder:
     def __init__(self, text_control: ft.Text, page: ft.Page):
         self.text_control = text_control
         self.page = page
+        # True の間は表示内容の変更のみ行い、送信は呼び出し側の page.update() に任せる
+        self.deferred = False
 
     def _update(self, msg, color):
         if self.text_control:
             self.text_control.value = str(msg)
             self.text_control.color = color
-            self.text_control.update() 
+            if not self.deferred:
+                self.text_control.update() 
 
     def info(self, msg): self._update(msg, ft.Colors.BLUE)
     def success(self, msg): self._update(msg, ft.Colors.GREEN)
@@ -5,14 +5,16 @@
 import logging
 import os
 import datetime
-from typing import Tuple, Dict, Any
+import math
+from collections import defaultdict
+from typing import Tuple, Dict, Any, List
 
 try:
     from utils.date_utils import generate_target_months, generate_target_months_for_full_scan
-    from utils.csv_handler import load_existing_csv, save_to_csv, _sort_key_for_csv
+    from utils.csv_handler import load_existing_csv, append_to_csv, _sort_key_for_csv
     from utils.summary_calculator import calculate_rekigun_summary, calculate_nendo_overtime
-    from dotenv import set_key 
-    from utils.encryption_utils import encrypt, CRYPTOGRAPHY_AVAILABLE 
+    from utils.env_utils import set_keys
+    from utils.encryption_utils import encrypt, decrypt, CRYPTOGRAPHY_AVAILABLE 
     
     from handlers.payslip_handler import PayslipHandler
     
@@ -25,6 +27,69 @@ logger = logging.getLogger(__name__)
 CSV_FILENAME = "年間サマリー_全期間.csv"
 BONUS_CSV_FILENAME = "年間賞与_全期間.csv"
 
+def _save_credentials_if_changed(env_path: str, credentials: Dict[str, str]) -> None:
+    """認証情報のうち .env の保存値 (復号後) と異なるものだけを保存します。
+
+    変更が無い場合は暗号化と .env の書き換えを行いません。変更がある場合は
+    1回の書き換えでまとめて保存し、os.environ も保存値に合わせて更新します。
+
+    Args:
+        env_path (str): .env ファイルのパス。
+        credentials (Dict[str, str]): 保存するキー名 (例: "MY_LOGIN_ID") と平文の値。
+    """
+    changed = {
+        key: encrypt(value) if CRYPTOGRAPHY_AVAILABLE else value
+        for key, value in credentials.items()
+        if _credential_changed(os.getenv(key, ""), value)
+    }
+    if changed and set_keys(env_path, changed):
+        os.environ.update(changed)
+
+def _credential_changed(stored: str, value: str) -> bool:
+    """保存値 stored を value で書き換える必要があるかを返します。
+
+    暗号化が有効なのに平文のまま保存されている値 (.env に直接記入された場合など) は、
+    内容が同じでも暗号化して保存し直すため変更ありとします。
+
+    Args:
+        stored (str): .env に保存されている値。
+        value (str): 保存する平文の値。
+
+    Returns:
+        bool: 保存が必要な場合はTrue。
+    """
+    if not stored:
+        return bool(value)
+    if CRYPTOGRAPHY_AVAILABLE and not stored.startswith("gAAAAA"):
+        return True
+    return decrypt(stored) != value
+
+def _as_number(value: Any) -> float:
+    """数値ならそのまま、数値文字列 ("1,234.5" 等) は変換し、それ以外 ("N/A" 等) は 0.0 として返します。"""
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", ""))
+        except ValueError:
+            pass
+    return 0.0
+
+def _bucket_by_reiwa_year(rows: List[Dict[str, Any]], key_name: str) -> Dict[str, List[Dict[str, Any]]]:
+    """行データを日付先頭の「令和XX年」ごとに振り分けます (1パス)。
+
+    Args:
+        rows (List[Dict[str, Any]]): CSV由来の行データ。
+        key_name (str): 日付のキー名 ("年月日" / "支給日")。
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: 「令和XX年」をキーとした行リストの辞書。
+    """
+    by_year: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        by_year[(row.get(key_name) or "")[:5]].append(row)
+    return by_year
+
 def run_main_logic(
     login_id: str, 
     password: str, 
@@ -50,7 +115,7 @@ def run_main_logic(
     for prefix in required_months_set: 
         try:
             target_years_to_run.add(int(prefix[2:4]) + 2018)
-        except: pass
+        except ValueError: pass
     target_years_to_run.add(ui_target_year)
     
     # 2. 既存データ読み込み
@@ -103,25 +168,23 @@ def run_main_logic(
 
     # 5. 結果保存
     if http_success:
+        try:
+            _save_credentials_if_changed(env_path, {"MY_LOGIN_ID": login_id, "MY_PASSWORD": password})
+        except Exception as e:
+            logger.warning(f"認証情報の保存に失敗しました: {e}")
+
         if all_new_payslips or all_new_bonuses:
             status_placeholder.success(f"更新完了: 給与+{len(all_new_payslips)}件, 賞与+{len(all_new_bonuses)}件")
-            try:
-                if CRYPTOGRAPHY_AVAILABLE:
-                    set_key(env_path, "MY_LOGIN_ID", encrypt(login_id))
-                    set_key(env_path, "MY_PASSWORD", encrypt(password))
-                else:
-                    set_key(env_path, "MY_LOGIN_ID", login_id)
-                    set_key(env_path, "MY_PASSWORD", password)
-            except: pass
 
+            # 既存行は書き直さず、新規行のみ追記する
             if all_new_payslips:
+                append_to_csv(all_existing_data, all_new_payslips, root_dir, CSV_FILENAME)
                 all_existing_data.extend(all_new_payslips)
-                save_to_csv(all_existing_data, root_dir, CSV_FILENAME)
             
             if all_new_bonuses:
-                all_existing_bonus.extend(all_new_bonuses)
                 bonus_headers = ["支給日", "賞与額", "差引支給額", "総支給額", "控除合計", "所得税", "社会保険料計"]
-                save_to_csv(all_existing_bonus, root_dir, BONUS_CSV_FILENAME, key_order=bonus_headers)
+                append_to_csv(all_existing_bonus, all_new_bonuses, root_dir, BONUS_CSV_FILENAME, key_order=bonus_headers)
+                all_existing_bonus.extend(all_new_bonuses)
         else:
             status_placeholder.success("データは最新です。")
     else:
@@ -132,24 +195,16 @@ def run_main_logic(
     reiwa_year_ui = ui_target_year - 2018
     target_reiwa_str = f"令和{reiwa_year_ui:02d}年"
     
-    final_data_ui = [d for d in all_existing_data if target_reiwa_str in d.get("年月日", "")]
-    final_data_ui.sort(key=_sort_key_for_csv)
-    
-    bonus_data_ui = [d for d in all_existing_bonus if target_reiwa_str in d.get("支給日", "")]
-    bonus_data_ui.sort(key=lambda x: x.get("支給日", ""))
+    final_data_ui = sorted(_bucket_by_reiwa_year(all_existing_data, "年月日").get(target_reiwa_str, []), key=_sort_key_for_csv)
+    bonus_data_ui = sorted(_bucket_by_reiwa_year(all_existing_bonus, "支給日").get(target_reiwa_str, []), key=lambda x: x.get("支給日", ""))
 
     # 7. サマリー計算
     summary_data_rekigun = {}
     summary_nendo_overtime = 0.0
     
     if final_data_ui:
-        calc_list = []
-        for item in final_data_ui:
-            c = item.copy()
-            for k in ['総支給額', '差引支給額', '総時間外']:
-                if not isinstance(c.get(k), (int, float)): c[k] = 0.0
-            calc_list.append(c)
-        summary_data_rekigun = calculate_rekigun_summary(calc_list)
+        # 集計側 (_sum_safe) が数値以外を無視するため、行のコピー・0.0変換は行わずそのまま渡す
+        summary_data_rekigun = calculate_rekigun_summary(final_data_ui)
         
         latest = final_data_ui[-1]
         summary_data_rekigun['latest_paid_leave_remaining_days'] = latest.get('有給残日数', 'N/A')
@@ -157,18 +212,9 @@ def run_main_logic(
     summary_nendo_overtime = calculate_nendo_overtime(all_existing_data, ui_target_year)
     
     # 賞与加算
-    total_bonus_pay = 0.0
-    total_bonus_net = 0.0
-    
-    if bonus_data_ui:
-        for b in bonus_data_ui:
-            try: b_pay = float(str(b.get("総支給額", 0)).replace(',', ''))
-            except: b_pay = 0.0
-            try: b_net = float(str(b.get("差引支給額", 0)).replace(',', ''))
-            except: b_net = 0.0
-            
-            total_bonus_pay += b_pay
-            total_bonus_net += b_net
+    # 金額はCSV読込時/パース時に数値化済みのため、数値以外 ("N/A") のみ 0 扱いにする
+    total_bonus_pay = math.fsum(_as_number(b.get("総支給額")) for b in bonus_data_ui)
+    total_bonus_net = math.fsum(_as_number(b.get("差引支給額")) for b in bonus_data_ui)
             
     if 'total_pay' not in summary_data_rekigun: summary_data_rekigun['total_pay'] = 0.0
     if 'total_net_pay' not in summary_data_rekigun: summary_data_rekigun['total_net_pay'] = 0.0
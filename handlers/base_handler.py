@@ -1,8 +1,10 @@
 import logging
 import os
 from abc import ABC
-from typing import Optional, Type
+from typing import BinaryIO, Dict, Optional, Type
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 class BaseWebHandler(ABC):
     """Webサイト操作ハンドラの基底クラス。
@@ -10,12 +12,19 @@ class BaseWebHandler(ABC):
     requests.Sessionの管理、共通ヘッダーの適用、および通信ログの出力機能を提供します。
 
     Attributes:
+        NETWORK_LOG_BUFFER_SIZE (int): 通信ログ書き込み時のバッファサイズ (バイト)。
+        CONNECTION_POOL_SIZE (int): ホストごとに保持するコネクション数の上限。
+        MAX_RETRIES (int): 接続エラー等の際の再試行回数。
         root_dir (str): アプリケーションのルートディレクトリパス。
         session (requests.Session): HTTPセッションオブジェクト。
         logger (logging.Logger): ロガーインスタンス。
         log_path (str): 通信ログの出力先ファイルパス。
     """
 
+    NETWORK_LOG_BUFFER_SIZE: int = 64 * 1024
+    CONNECTION_POOL_SIZE: int = 16
+    MAX_RETRIES: int = 3
+
     def __init__(self, root_dir: str) -> None:
         """BaseWebHandlerを初期化します。
 
@@ -32,18 +41,63 @@ class BaseWebHandler(ABC):
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
             "Accept-Language": "ja,en-US;q=0.9,en;q=0.8",
         })
+
+        # Keep-Aliveでコネクションを使い回し、並列リクエスト時も再接続しないようプールを拡張
+        # (Accept-Encoding は requests の既定値が gzip/deflate を要求するためそのまま使用)
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=self.CONNECTION_POOL_SIZE,
+            max_retries=Retry(total=self.MAX_RETRIES, backoff_factor=0.3)
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         
         self.log_path: str = ""
+        self._log_fp: Optional[BinaryIO] = None
+        self._charset_by_content_type: Dict[str, Optional[str]] = {}
         self._setup_network_log()
 
     def _setup_network_log(self) -> None:
-        """デバッグ用ネットワークログの出力先ディレクトリとファイルパスを設定します。"""
+        """デバッグ用ネットワークログの出力先を設定し、ファイルを開きます。
+
+        ファイルはハンドラの生存期間中開いたままにし、書き込みはバッファリングして
+        `close()` 時にまとめて書き出します。
+        """
         try:
             output_dir = os.path.join(self.root_dir, "output")
             os.makedirs(output_dir, exist_ok=True)
             self.log_path = os.path.join(output_dir, "debug_network_log.txt")
+            self._log_fp = open(self.log_path, "ab", buffering=self.NETWORK_LOG_BUFFER_SIZE)
         except OSError:
-            pass
+            self._log_fp = None
+
+    def _resolve_encoding(self, response: requests.Response) -> str:
+        """レスポンスの文字コードを決定します。
+
+        Content-Typeヘッダーにcharsetがあればそれを使用し、無い場合のみ本文から推定します。
+        同一サイトのレスポンスは同じContent-Typeを返すため、ヘッダー値ごとの解析結果は
+        同一ハンドラ内でキャッシュして使い回します。本文からの推定はレスポンスごとに行います
+        (リダイレクトやエラーページなど、最初のレスポンスの推定結果で以降のページを解釈しないため)。
+
+        Args:
+            response (requests.Response): 対象のレスポンスオブジェクト。
+
+        Returns:
+            str: 文字コード名。
+        """
+        content_type = response.headers.get("Content-Type", "")
+        if content_type not in self._charset_by_content_type:
+            charset = None
+            lowered = content_type.lower()
+            if "charset=" in lowered:
+                charset = lowered.split("charset=")[-1].split(";")[0].strip().strip('"\'') or None
+            self._charset_by_content_type[content_type] = charset
+
+        charset = self._charset_by_content_type[content_type]
+        if charset:
+            return charset
+
+        return response.apparent_encoding
 
     def log_response(self, step_name: str, response: requests.Response) -> None:
         """通信結果をログファイルに記録します。
@@ -52,23 +106,35 @@ class BaseWebHandler(ABC):
             step_name (str): 処理のステップ名（ログの見出しに使用）。
             response (requests.Response): 記録対象のレスポンスオブジェクト。
         """
-        response.encoding = response.apparent_encoding
+        response.encoding = self._resolve_encoding(response)
         
-        if not self.log_path:
+        if not self._log_fp:
             return
             
+        entry = (
+            f"--- [{self.__class__.__name__}] {step_name} ---\n"
+            f"URL: {response.request.url}\n"
+            f"Status: {response.status_code}\n"
+            "\n"
+        )
         try:
-            with open(self.log_path, "a", encoding="utf-8") as f:
-                f.write(f"--- [{self.__class__.__name__}] {step_name} ---\n")
-                f.write(f"URL: {response.request.url}\n")
-                f.write(f"Status: {response.status_code}\n")
-                f.write("\n")
-        except OSError:
+            self._log_fp.write(entry.encode("utf-8"))
+        except (OSError, ValueError):
             pass
 
     def close(self) -> None:
-        """セッションを閉じ、リソースを解放します。"""
+        """セッションを閉じ、リソースを解放します。
+
+        バッファリングされた通信ログもここで書き出します。
+        """
         self.session.close()
+        if self._log_fp:
+            try:
+                self._log_fp.flush()
+                self._log_fp.close()
+            except OSError:
+                pass
+            self._log_fp = None
 
     def __enter__(self) -> "BaseWebHandler":
         return self
@@ -1,10 +1,59 @@
 import os
-from typing import Dict, Any, Tuple, List, Set, Optional
-from urllib.parse import urlparse, parse_qs
-from bs4 import BeautifulSoup
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, Tuple, List, Set, Optional
+import requests
+import lxml.html
+from lxml import etree
 
 from .base_handler import BaseWebHandler
 
+# ASP.NETの状態保持用 hidden input (name属性 → value属性の順で出力される)
+_ASPNET_STATE_RE = re.compile(
+    rb'<input[^>]*?\sname="(__VIEWSTATE|__VIEWSTATEGENERATOR|__EVENTVALIDATION)"[^>]*?\svalue="([^"]*)"'
+)
+
+# 一覧画面の明細テーブル (<table id="tdb">) の各行 / セル / 詳細ボタン
+_LIST_ROW_XPATH = etree.XPath("(//table[@id='tdb'])[1]//tr")
+_LIST_CELL_XPATH = etree.XPath(".//td")
+_LIST_BUTTON_XPATH = etree.XPath("(.//input)[1]")
+
+# 詳細画面の項目 (<div id="Html"> 内の <dl><dt>項目名</dt><dd>値</dd></dl>)
+_DETAIL_DL_XPATH = etree.XPath("(//div[@id='Html'])[1]//dl")
+_DETAIL_DT_XPATH = etree.XPath("(.//dt)[1]")
+_DETAIL_DD_XPATH = etree.XPath("(.//dd)[1]")
+_STRIP_COMMA = str.maketrans("", "", ",")
+
+# 給与詳細の項目名 -> 保存時のキー名
+_SALARY_KEY_MAP = {
+    '総支給額': '総支給額', '差引支給額': '差引支給額', '総時間外': '総時間外',
+    '有給消化時間': '有給消化時間', '有休使用日数': '有給使用日数', '有休残日数': '有給残日数'
+}
+
+def _stripped_text(element: lxml.html.HtmlElement) -> str:
+    """要素配下のテキストを各断片ごとにstripして連結します (BeautifulSoupの get_text(strip=True) 相当)。"""
+    return "".join(s.strip() for s in element.itertext())
+
+def _iter_list_rows(root: lxml.html.HtmlElement) -> Iterator[Tuple[str, Optional[str]]]:
+    """一覧画面の明細テーブルから (日付文字列, 詳細ボタン名) を順に返します。
+
+    詳細ボタンが無い行のボタン名は None になります。
+    """
+    for row in _LIST_ROW_XPATH(root):
+        cells = _LIST_CELL_XPATH(row)
+        if len(cells) < 3:
+            continue
+        btn = _LIST_BUTTON_XPATH(cells[1])
+        yield _stripped_text(cells[2]), (btn[0].get('name') if btn else None)
+
+def _iter_detail_items(root: lxml.html.HtmlElement) -> Iterator[Tuple[str, str]]:
+    """詳細画面から (項目名, カンマ除去済みの値文字列) を順に返します。"""
+    for dl in _DETAIL_DL_XPATH(root):
+        dt = _DETAIL_DT_XPATH(dl)
+        dd = _DETAIL_DD_XPATH(dl)
+        if dt and dd:
+            yield _stripped_text(dt[0]), _stripped_text(dd[0]).translate(_STRIP_COMMA)
+
 class PayslipHandler(BaseWebHandler):
     """給与・賞与明細サイト (ASP.NET) 操作用ハンドラ。
 
@@ -12,6 +61,7 @@ class PayslipHandler(BaseWebHandler):
 
     Attributes:
         BASE_URL (str): 明細サイトのベースURL。
+        MAX_DETAIL_WORKERS (int): 詳細ページを並列取得する際の最大スレッド数。
         current_form_data (Dict[str, str]): 現在のViewState等を含むフォームデータ。
         current_url (str): 現在のページURL。
         menu_url (str): メニュー画面のURL（遷移の起点）。
@@ -19,6 +69,7 @@ class PayslipHandler(BaseWebHandler):
     """
     
     BASE_URL: str = "https://meisai.palma-svc.co.jp/users"
+    MAX_DETAIL_WORKERS: int = 8
     
     def __init__(self, root_dir: str) -> None:
         """PayslipHandlerを初期化します。
@@ -31,107 +82,157 @@ class PayslipHandler(BaseWebHandler):
         self.current_url: str = ""
         self.menu_url: str = ""
         self.menu_form_data: Dict[str, str] = {}
+        self._html_parsers: Dict[str, lxml.html.HTMLParser] = {}
 
     # =================================================================
     # ヘルパーメソッド (内部利用)
     # =================================================================
     
-    def _update_aspnet_state(self, soup: BeautifulSoup, url: str) -> None:
+    def _update_aspnet_state(self, content: bytes, url: str) -> None:
         """レスポンスHTMLからASP.NETのViewState等を抽出し、内部状態を更新します。
 
+        必要なのは3つの hidden input のみのため、DOMを構築せず正規表現で抽出します。
+
         Args:
-            soup (BeautifulSoup): 解析対象のHTML。
+            content (bytes): 解析対象のHTML (レスポンスボディ)。
             url (str): 現在のURL。
         """
         self.current_url = url
         try:
-            viewstate = soup.find('input', {'name': '__VIEWSTATE'})
-            event_val = soup.find('input', {'name': '__EVENTVALIDATION'})
-            view_gen = soup.find('input', {'name': '__VIEWSTATEGENERATOR'})
-            
-            self.current_form_data = {
-                "__VIEWSTATE": viewstate.get('value', '') if viewstate else "",
-                "__EVENTVALIDATION": event_val.get('value', '') if event_val else "",
-                "__VIEWSTATEGENERATOR": view_gen.get('value', '') if view_gen else ""
-            }
+            form_data = {"__VIEWSTATE": "", "__EVENTVALIDATION": "", "__VIEWSTATEGENERATOR": ""}
+            for match in _ASPNET_STATE_RE.finditer(content):
+                form_data[match.group(1).decode("ascii")] = match.group(2).decode("latin-1")
+            self.current_form_data = form_data
         except Exception:
             self.logger.warning("ASP.NET Stateの抽出に失敗しました")
             self.current_form_data = {}
 
-    def _get_timestamp_from_url(self, url: str) -> Optional[str]:
-        """URLクエリパラメータからtimestampを取得します。
+    def _fetch_detail_pages(
+        self,
+        list_url: str,
+        list_form: Dict[str, str],
+        targets: List[Tuple[str, str]],
+        step_name: str
+    ) -> List[Tuple[str, requests.Response]]:
+        """一覧画面の明細ボタンに対応する詳細ページを並列に取得します。
+
+        各リクエストは一覧画面のフォームデータのみに依存するため、
+        詳細画面から一覧へ戻る遷移を挟まずに並行して送信できます。
 
         Args:
-            url (str): 解析対象のURL。
+            list_url (str): 一覧画面のURL。
+            list_form (Dict[str, str]): 一覧画面のViewState等を含むフォームデータ。
+            targets (List[Tuple[str, str]]): (日付文字列, ボタン名) のリスト。
+            step_name (str): 通信ログの見出し。
 
         Returns:
-            Optional[str]: タイムスタンプ文字列。存在しない場合はNone。
+            List[Tuple[str, requests.Response]]: targets の順に並んだ (日付文字列, レスポンス) のリスト。
+                取得に失敗したものは含まれません。
         """
-        try:
-            parsed = urlparse(url)
-            query = parse_qs(parsed.query)
-            return query.get('timestamp', [None])[0]
-        except Exception:
-            return None
+        if not targets:
+            return []
+
+        # 共通部分は一度だけ組み立て、各スレッドではコピーしてボタン名のみ差し替える
+        base_payload = {"__EVENTTARGET": "", "__EVENTARGUMENT": "", **list_form}
+
+        def fetch(d_text: str, btn_name: str) -> requests.Response:
+            payload = base_payload.copy()
+            payload["__EVENTTARGET"] = btn_name
+            resp = self.session.post(list_url, data=payload, headers={"Referer": list_url})
+            self.log_response(f"{step_name} {d_text}", resp)
+            return resp
+
+        pages = []
+        workers = min(self.MAX_DETAIL_WORKERS, len(targets))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [(d_text, executor.submit(fetch, d_text, btn_name)) for d_text, btn_name in targets]
+            for d_text, future in futures:
+                try:
+                    pages.append((d_text, future.result()))
+                except Exception as e:
+                    self.logger.error(f"詳細ページの取得に失敗しました ({d_text}): {e}")
+        return pages
+
+    def _return_to_menu(self, list_url: str, list_form: Dict[str, str], step_name: str) -> None:
+        """一覧画面からメニューへ戻り、メニューのURLとフォームデータを更新します。
+
+        詳細ページは一覧のフォームデータから直接取得するため、明細ごとに一覧へ戻る必要はなく、
+        一覧の処理を終えた後に一度だけ呼び出します。
+
+        Args:
+            list_url (str): 一覧画面のURL。
+            list_form (Dict[str, str]): 一覧画面のViewState等を含むフォームデータ。
+            step_name (str): 通信ログの見出し。
+        """
+        b_load = {
+            "__EVENTTARGET": "cmdGoBack", "__EVENTARGUMENT": "",
+            **list_form
+        }
+        resp = self.session.post(list_url, data=b_load, headers={"Referer": list_url})
+        self.log_response(step_name, resp)
 
-    def _parse_detail_salary(self, soup: BeautifulSoup) -> Dict[str, Any]:
+        self._update_aspnet_state(resp.content, resp.url)
+        self.menu_url = resp.url
+        self.menu_form_data = self.current_form_data.copy()
+
+    def _parse_html(self, resp: requests.Response) -> lxml.html.HtmlElement:
+        """レスポンスをlxmlでパースしてルート要素を返します。
+
+        Args:
+            resp (requests.Response): 対象のレスポンス (log_response 済みで encoding 設定済みであること)。
+
+        Returns:
+            lxml.html.HtmlElement: ドキュメントのルート要素。
+
+        Notes:
+            バイト列を文字コード指定付きでlibxml2に渡し、Python側での resp.text へのデコードを行いません。
+            パーサーは文字コードごとに生成してキャッシュします (パースはメインスレッドのみで行う)。
+        """
+        parser = self._html_parsers.get(resp.encoding)
+        if parser is None:
+            parser = self._html_parsers[resp.encoding] = lxml.html.HTMLParser(encoding=resp.encoding)
+        return lxml.html.document_fromstring(resp.content, parser=parser)
+
+    def _parse_detail_salary(self, root: lxml.html.HtmlElement) -> Dict[str, Any]:
         """給与詳細HTMLをパースしてデータを抽出します。
 
         Args:
-            soup (BeautifulSoup): 解析対象のHTML。
+            root (lxml.html.HtmlElement): 解析対象のHTML。
 
         Returns:
             Dict[str, Any]: 抽出された給与データの辞書。
         """
         data = {k: "N/A" for k in ["総支給額", "差引支給額", "総時間外", "有給消化時間", "有給使用日数", "有給残日数"]}
         try:
-            html_div = soup.find('div', id='Html')
-            if html_div:
-                for dl in html_div.find_all('dl'):
-                    dt = dl.find('dt')
-                    dd = dl.find('dd')
-                    if dt and dd:
-                        key = dt.get_text(strip=True)
-                        val_str = dd.get_text(strip=True).replace(',', '')
-                        try:
-                            val_num = float(val_str) if '.' in val_str else int(val_str)
-                        except ValueError:
-                            val_num = val_str
-                        
-                        mapping = {
-                            '総支給額': '総支給額', '差引支給額': '差引支給額', '総時間外': '総時間外',
-                            '有給消化時間': '有給消化時間', '有休使用日数': '有給使用日数', '有休残日数': '有給残日数'
-                        }
-                        if key in mapping:
-                            data[mapping[key]] = val_num
+            for key, val_str in _iter_detail_items(root):
+                if key not in _SALARY_KEY_MAP:
+                    continue
+                try:
+                    val_num = float(val_str) if '.' in val_str else int(val_str)
+                except ValueError:
+                    val_num = val_str
+                data[_SALARY_KEY_MAP[key]] = val_num
         except Exception:
             pass
         return data
 
-    def _parse_detail_bonus(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    def _parse_detail_bonus(self, root: lxml.html.HtmlElement) -> Dict[str, Any]:
         """賞与詳細HTMLをパースしてデータを抽出します。
 
         Args:
-            soup (BeautifulSoup): 解析対象のHTML。
+            root (lxml.html.HtmlElement): 解析対象のHTML。
 
         Returns:
             Dict[str, Any]: 抽出された賞与データの辞書。
         """
         data = {k: "N/A" for k in ["賞与額", "控除合計", "差引支給額", "総支給額", "所得税", "社会保険料計"]}
         try:
-            html_div = soup.find('div', id='Html')
-            if html_div:
-                for dl in html_div.find_all('dl'):
-                    dt = dl.find('dt')
-                    dd = dl.find('dd')
-                    if dt and dd:
-                        key = dt.get_text(strip=True)
-                        val_str = dd.get_text(strip=True).replace(',', '')
-                        try: val_num = int(val_str)
-                        except ValueError: val_num = val_str
-                        
-                        if key in data:
-                            data[key] = val_num
+            for key, val_str in _iter_detail_items(root):
+                if key not in data:
+                    continue
+                try: val_num = int(val_str)
+                except ValueError: val_num = val_str
+                data[key] = val_num
         except Exception:
             pass
         return data
@@ -160,8 +261,7 @@ class PayslipHandler(BaseWebHandler):
             # GET
             resp = self.session.get(login_url)
             self.log_response("Login Page GET", resp)
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            self._update_aspnet_state(soup, resp.url)
+            self._update_aspnet_state(resp.content, resp.url)
             
             # POST
             payload = {
@@ -178,8 +278,7 @@ class PayslipHandler(BaseWebHandler):
                 return False, "ログインに失敗しました"
             
             # メニュー画面の状態を保存
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            self._update_aspnet_state(soup, resp.url)
+            self._update_aspnet_state(resp.content, resp.url)
             self.menu_url = resp.url
             self.menu_form_data = self.current_form_data.copy()
             
@@ -225,62 +324,29 @@ class PayslipHandler(BaseWebHandler):
             resp = self.session.post(self.menu_url, data=payload, headers={"Referer": self.menu_url})
             self.log_response("To Salary List", resp)
             
-            list_soup = BeautifulSoup(resp.text, 'html.parser')
-            self._update_aspnet_state(list_soup, resp.url)
+            list_root = self._parse_html(resp)
+            self._update_aspnet_state(resp.content, resp.url)
             list_url = resp.url
             list_form = self.current_form_data.copy()
 
+            # 対象月が全て見つかった後は、同月の行が続く間だけ走査して打ち切る
             targets = []
-            table = list_soup.find('table', {'id': 'tdb'})
-            if table:
-                for row in table.find_all('tr'):
-                    cells = row.find_all('td')
-                    if len(cells) < 3: continue
-                    d_text = cells[2].get_text(strip=True)
-                    if d_text[0:8] in target_dates_set:
-                        btn = cells[1].find('input')
-                        if btn: targets.append((d_text, btn.get('name')))
-
-            for d_text, btn_name in targets:
-                p_load = {
-                    "__EVENTTARGET": btn_name, "__EVENTARGUMENT": "",
-                    **list_form
-                }
-                resp = self.session.post(list_url, data=p_load, headers={"Referer": list_url})
-                self.log_response(f"Salary Detail {d_text}", resp)
-                
-                det_soup = BeautifulSoup(resp.text, 'html.parser')
-                data = self._parse_detail_salary(det_soup)
+            remaining = set(target_dates_set)
+            for d_text, btn_name in _iter_list_rows(list_root):
+                prefix = d_text[0:8]
+                if prefix not in target_dates_set:
+                    if not remaining: break
+                    continue
+                remaining.discard(prefix)
+                if btn_name is not None:
+                    targets.append((d_text, btn_name))
+
+            for d_text, det_resp in self._fetch_detail_pages(list_url, list_form, targets, "Salary Detail"):
+                data = self._parse_detail_salary(self._parse_html(det_resp))
                 data["年月日"] = d_text
                 results.append(data)
-                
-                # 戻る
-                self._update_aspnet_state(det_soup, resp.url)
-                ts = self._get_timestamp_from_url(resp.url)
-                b_load = {
-                    "__EVENTTARGET": "cmdGoBack", "__EVENTARGUMENT": "",
-                    **self.current_form_data,
-                    "timestamp": ts
-                }
-                resp = self.session.post(resp.url, data=b_load, headers={"Referer": resp.url})
-                
-                list_soup = BeautifulSoup(resp.text, 'html.parser')
-                self._update_aspnet_state(list_soup, resp.url)
-                list_url = resp.url
-                list_form = self.current_form_data.copy()
-
-            # メニューに戻る
-            b_load = {
-                "__EVENTTARGET": "cmdGoBack", "__EVENTARGUMENT": "",
-                **list_form
-            }
-            resp = self.session.post(list_url, data=b_load, headers={"Referer": list_url})
-            self.log_response("Back to Menu", resp)
-            
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            self._update_aspnet_state(soup, resp.url)
-            self.menu_url = resp.url
-            self.menu_form_data = self.current_form_data.copy()
+
+            self._return_to_menu(list_url, list_form, "Back to Menu")
 
         except Exception as e:
             self.logger.error(f"給与取得エラー: {e}")
@@ -313,63 +379,28 @@ class PayslipHandler(BaseWebHandler):
                 self.logger.info("賞与ページへ遷移できませんでした")
                 return results
 
-            list_soup = BeautifulSoup(resp.text, 'html.parser')
-            self._update_aspnet_state(list_soup, resp.url)
+            list_root = self._parse_html(resp)
+            self._update_aspnet_state(resp.content, resp.url)
             list_url = resp.url
             list_form = self.current_form_data.copy()
 
+            # 一覧は支給日順のため、対象年の行が途切れた時点で打ち切る
             targets = []
-            table = list_soup.find('table', {'id': 'tdb'})
-            if table:
-                for row in table.find_all('tr'):
-                    cells = row.find_all('td')
-                    if len(cells) < 3: continue
-                    d_text = cells[2].get_text(strip=True)
-                    
-                    if target_reiwa_year in d_text and d_text not in existing_dates:
-                        btn = cells[1].find('input')
-                        if btn: targets.append((d_text, btn.get('name')))
+            in_year_block = False
+            for d_text, btn_name in _iter_list_rows(list_root):
+                if target_reiwa_year not in d_text:
+                    if in_year_block: break
+                    continue
+                in_year_block = True
+                if d_text not in existing_dates and btn_name is not None:
+                    targets.append((d_text, btn_name))
             
-            for d_text, btn_name in targets:
-                p_load = {
-                    "__EVENTTARGET": btn_name, "__EVENTARGUMENT": "",
-                    **list_form
-                }
-                resp = self.session.post(list_url, data=p_load, headers={"Referer": list_url})
-                self.log_response(f"Bonus Detail {d_text}", resp)
-                
-                det_soup = BeautifulSoup(resp.text, 'html.parser')
-                data = self._parse_detail_bonus(det_soup)
+            for d_text, det_resp in self._fetch_detail_pages(list_url, list_form, targets, "Bonus Detail"):
+                data = self._parse_detail_bonus(self._parse_html(det_resp))
                 data["支給日"] = d_text
                 results.append(data)
-                
-                # 戻る
-                self._update_aspnet_state(det_soup, resp.url)
-                ts = self._get_timestamp_from_url(resp.url)
-                b_load = {
-                    "__EVENTTARGET": "cmdGoBack", "__EVENTARGUMENT": "",
-                    **self.current_form_data,
-                    "timestamp": ts
-                }
-                resp = self.session.post(resp.url, data=b_load, headers={"Referer": resp.url})
-                
-                list_soup = BeautifulSoup(resp.text, 'html.parser')
-                self._update_aspnet_state(list_soup, resp.url)
-                list_url = resp.url
-                list_form = self.current_form_data.copy()
             
-            # メニューに戻る
-            b_load = {
-                "__EVENTTARGET": "cmdGoBack", "__EVENTARGUMENT": "",
-                **list_form
-            }
-            resp = self.session.post(list_url, data=b_load, headers={"Referer": list_url})
-            self.log_response("Back to Menu (Bonus End)", resp)
-
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            self._update_aspnet_state(soup, resp.url)
-            self.menu_url = resp.url
-            self.menu_form_data = self.current_form_data.copy()
+            self._return_to_menu(list_url, list_form, "Back to Menu (Bonus End)")
             
         except Exception as e:
             self.logger.error(f"賞与取得エラー: {e}")
@@ -3,11 +3,46 @@ import re
 import os
 from typing import Dict, List, Tuple, Any, Optional
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 from datetime import datetime, date
 
 from .base_handler import BaseWebHandler
 
+# 勤務表ページの解析に必要なフォーム要素のみをツリーに残す
+# (form に一致した要素は配下ごと保持されるため、find_parent("form") も従来通り動作する)
+_FORM_STRAINER = SoupStrainer(["form", "input", "select", "option", "textarea"])
+
+# 勤務データ行のID項目 (workDataDetailList[<行番号>].id)
+_RE_ROW_ID_NAME = re.compile(r'workDataDetailList\[(\d+)\]\.id')
+
+# 勤務データ行から値をそのまま取り込む項目
+_ROW_VALUE_KEYS = (
+    "workDate", "youbi", "youbiCode", "shukujitsu", "nenkyu",
+    "approvalName", "slideStatus", "kakuteiShime", "kakuteiShonin", "isAvailableCopy"
+)
+# 時刻入力項目 (フォームの項目名, UI側のキー)
+_UI_KEYS = (
+    ("workStartTimeHour", "start_h"), ("workStartTimeMinute", "start_m"),
+    ("workEndTimeHour", "end_h"), ("workEndTimeMinute", "end_m"),
+    ("restTimeHour", "rest_h"), ("restTimeMinute", "rest_m"),
+    ("midnightTimeHour", "mid_h"), ("midnightTimeMinute", "mid_m"),
+)
+# 時刻入力項目のUI側キー (_UI_KEYS の順)
+_UI_VALUE_KEYS = tuple(val_name for _, val_name in _UI_KEYS)
+
+# ペイロード構築時に文字列として参照する行データの項目 (workType は既定値 "99" のため別扱い)
+_PAYLOAD_ROW_KEYS = (
+    "id", "workDate", "shukujitsu", "comment",
+    "start_h", "start_m", "end_h", "end_m", "rest_h", "rest_m", "mid_h", "mid_m"
+)
+
+# エラーメッセージ抽出用 (class="error" の要素 / 赤字指定の ul)
+_ERR_COLOR_RE = re.compile(r"color:\s*red", re.I)
+_CLASS_ERROR_STRAINER = SoupStrainer(class_="error")
+_RED_LIST_STRAINER = SoupStrainer("ul", style=_ERR_COLOR_RE)
+# セッション確認用 (登録ボタンのみ)
+_REGISTER_STRAINER = SoupStrainer("input", attrs={"name": "register"})
+
 class ScheduleHandler(BaseWebHandler):
     """勤務表サイト (ts.wjtime.jp) 操作用ハンドラ。
 
@@ -38,6 +73,9 @@ class ScheduleHandler(BaseWebHandler):
         if not self.LOGIN_URL or not self.ORIGIN:
             self.logger.error("環境変数の取得に失敗しました: SCHEDULE_LOGIN_URL または SCHEDULE_ORIGIN が設定されていません。")
             raise ValueError("環境変数の設定エラー")
+
+        # コネクションプール/Keep-Alive は基底クラスで設定済み。Originは全リクエスト共通のためセッションに設定する
+        self.session.headers["Origin"] = self.ORIGIN
         
     def login(self, login_id: str, password: str) -> Tuple[bool, str]:
         """勤務表サイトへログインします。
@@ -59,9 +97,7 @@ class ScheduleHandler(BaseWebHandler):
         try:
             self.logger.info(f"勤務表サイトへログインを試行します: {self.LOGIN_URL}")
             
-            headers = {"Origin": self.ORIGIN}
-            
-            resp = self.session.post(self.LOGIN_URL, data=payload, headers=headers)
+            resp = self.session.post(self.LOGIN_URL, data=payload)
             self.log_response("Schedule Login", resp)
             resp.raise_for_status()
             
@@ -85,7 +121,7 @@ class ScheduleHandler(BaseWebHandler):
             resp = self.session.get(self.current_url)
             self.log_response("Get Schedule Page", resp)
             
-            soup = BeautifulSoup(resp.text, 'html.parser')
+            soup = BeautifulSoup(resp.text, 'lxml', parse_only=_FORM_STRAINER)
             data = self._parse_schedule_rows(soup)
             self.logger.info(f"データパース結果: {len(data)}件のデータを取得しました。")
             
@@ -97,6 +133,41 @@ class ScheduleHandler(BaseWebHandler):
             self.logger.error(f"データ取得エラー: {e}", exc_info=True)
             return False, f"データ取得エラー: {e}", []
 
+    def is_session_alive(self) -> bool:
+        """保持しているセッションで勤務表ページを開けるか (ログイン画面に戻されず、登録ボタンがあるか) を確認します。
+
+        Returns:
+            bool: セッションが有効であればTrue。
+        """
+        if not self.current_url:
+            return False
+        try:
+            resp = self.session.get(self.current_url)
+            self.log_response("Check Session", resp)
+            if not resp.ok or "/auth/" in resp.url:
+                return False
+            soup = BeautifulSoup(resp.text, 'lxml', parse_only=_REGISTER_STRAINER)
+            return soup.find("input", {"name": "register"}) is not None
+        except Exception as e:
+            self.logger.warning(f"セッション確認中にエラーが発生しました: {e}")
+            return False
+
+    def check_input(self, ui_data_list: List[Dict[str, Any]]) -> str:
+        """送信前の入力チェックを行います (通信は行いません)。
+
+        Args:
+            ui_data_list (List[Dict[str, Any]]): 検証対象のデータリスト。
+
+        Returns:
+            str: エラーメッセージ。問題が無ければ空文字。
+        """
+        errors = self._validate_input(ui_data_list)
+        if not errors:
+            return ""
+        error_msg = "入力内容に不備があります。修正してください。\n\n" + "\n".join(errors)
+        self.logger.warning(f"バリデーションエラー: {error_msg}")
+        return error_msg
+
     def update_schedule(self, ui_data_list: List[Dict[str, Any]]) -> Tuple[bool, str, List[Dict[str, Any]]]:
         """勤務データを一括更新します。
 
@@ -114,26 +185,23 @@ class ScheduleHandler(BaseWebHandler):
 
         self.logger.info("update_schedule: 登録処理を開始します。")
 
-        errors = self._validate_input(ui_data_list)
-        if errors:
-            error_msg = "入力内容に不備があります。修正してください。\n\n" + "\n".join(errors)
-            self.logger.warning(f"バリデーションエラー: {error_msg}")
+        error_msg = self.check_input(ui_data_list)
+        if error_msg:
             return False, error_msg, []
 
         try:
             # POST先とトークン等の収集のためGET
             resp = self.session.get(self.current_url)
-            soup = BeautifulSoup(resp.text, 'html.parser')
+            soup = BeautifulSoup(resp.text, 'lxml', parse_only=_FORM_STRAINER)
             
             register_btn = soup.find("input", {"name": "register"})
             if not register_btn:
-                self.logger.warning("registerボタンが見つかりません。")
-                form = soup
-                post_url = self.current_url
-            else:
-                form = register_btn.find_parent("form")
-                action = form.get("action")
-                post_url = urljoin(self.current_url, action) if action else self.current_url
+                # ログイン画面に戻された場合など。ページ全体を送信すると登録されないまま成功扱いになるため中止する
+                self.logger.error("registerボタンが見つかりません。")
+                return False, "登録フォームが見つかりません (セッション切れの可能性があります)。", []
+            form = register_btn.find_parent("form")
+            action = form.get("action")
+            post_url = urljoin(self.current_url, action) if action else self.current_url
             
             self.logger.info(f"POST先URL: {post_url}")
 
@@ -141,8 +209,7 @@ class ScheduleHandler(BaseWebHandler):
             
             headers = {
                 "Referer": self.current_url, 
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Origin": self.ORIGIN
+                "Content-Type": "application/x-www-form-urlencoded"
             }
             resp_post = self.session.post(post_url, data=payload, headers=headers)
             self.log_response("Update Schedule POST", resp_post)
@@ -158,6 +225,14 @@ class ScheduleHandler(BaseWebHandler):
                 return False, f"入力エラー: {error_detail}", []
 
             logger_msg = "登録が完了しました。"
+
+            # 登録後のレスポンスが勤務表ページそのものであれば、再取得せずにそれを解析する
+            soup_post = BeautifulSoup(resp_post.text, 'lxml', parse_only=_FORM_STRAINER)
+            latest_data = self._parse_schedule_rows(soup_post)
+            if latest_data:
+                self.current_url = resp_post.url
+                self.logger.info(f"登録後のレスポンスから {len(latest_data)}件のデータを取得しました。")
+                return True, logger_msg, latest_data
             
             success_get, _, latest_data = self.get_current_data()
             if success_get:
@@ -189,33 +264,40 @@ class ScheduleHandler(BaseWebHandler):
             if form:
                 target_area = form
 
+        # name属性 -> 要素 の索引を1パスで作成し、以降は行・項目ごとに辞書引きする
+        # (同名要素が複数ある場合は find と同じく文書順で最初のものを採用)
+        inputs_by_name: Dict[str, Tag] = {}
+        selects_by_name: Dict[str, Tag] = {}
+        for tag in target_area.find_all(["input", "select"]):
+            name = tag.get("name")
+            if not name: continue
+            index = inputs_by_name if tag.name == "input" else selects_by_name
+            index.setdefault(name, tag)
+
+        # ID項目が存在する行番号のみを対象にする
+        row_indices = sorted(
+            int(m.group(1)) for m in map(_RE_ROW_ID_NAME.fullmatch, inputs_by_name) if m
+        )
+
         found_count = 0
-        for i in range(32):
-            id_input = target_area.find("input", {"name": f"workDataDetailList[{i}].id"})
-            if not id_input:
-                continue 
+        for i in row_indices:
+            prefix = f"workDataDetailList[{i}]."
+            id_input = inputs_by_name[prefix + "id"]
             
             found_count += 1
             row_data = {}
             row_data["index"] = i
             row_data["id"] = id_input.get("value", "")
             
-            for key in ["workDate", "youbi", "youbiCode", "shukujitsu", "nenkyu", 
-                        "approvalName", "slideStatus", "kakuteiShime", "kakuteiShonin", "isAvailableCopy"]:
-                inp = target_area.find("input", {"name": f"workDataDetailList[{i}].{key}"})
+            for key in _ROW_VALUE_KEYS:
+                inp = inputs_by_name.get(prefix + key)
                 row_data[key] = inp.get("value", "") if inp else ""
 
-            ui_key_map = {
-                "workStartTimeHour": "start_h", "workStartTimeMinute": "start_m",
-                "workEndTimeHour": "end_h", "workEndTimeMinute": "end_m",
-                "restTimeHour": "rest_h", "restTimeMinute": "rest_m",
-                "midnightTimeHour": "mid_h", "midnightTimeMinute": "mid_m"
-            }
-            for key, val_name in ui_key_map.items():
-                inp = target_area.find("input", {"name": f"workDataDetailList[{i}].{key}"})
+            for key, val_name in _UI_KEYS:
+                inp = inputs_by_name.get(prefix + key)
                 row_data[val_name] = inp.get("value", "") if inp else ""
 
-            work_type_select = target_area.find("select", {"name": f"workDataDetailList[{i}].workType"})
+            work_type_select = selects_by_name.get(prefix + "workType")
             selected_type = "99" 
             if work_type_select:
                 selected_option = work_type_select.find("option", selected=True)
@@ -223,10 +305,10 @@ class ScheduleHandler(BaseWebHandler):
                     selected_type = selected_option.get("value")
             row_data["workType"] = selected_type
 
-            comment_input = target_area.find("input", {"name": f"workDataDetailList[{i}].comment"})
+            comment_input = inputs_by_name.get(prefix + "comment")
             row_data["comment"] = comment_input.get("value", "") if comment_input else ""
 
-            kakutei_input = target_area.find("input", {"name": f"workDataDetailList[{i}].kakutei"})
+            kakutei_input = inputs_by_name.get(prefix + "kakutei")
             row_data["is_kakutei"] = True if kakutei_input and kakutei_input.has_attr("checked") else False
             
             row_data["shukujitsu_bool"] = (row_data.get("shukujitsu") == "true")
@@ -245,32 +327,28 @@ class ScheduleHandler(BaseWebHandler):
             List[str]: エラーメッセージのリスト。
         """
         error_messages = []
-        def _safe_str(val: Optional[Any]) -> str:
-            return str(val) if val is not None else ""
+        def _filled(val: Optional[Any]) -> bool:
+            return val is not None and bool(str(val).strip())
 
         for row in data_list:
             date_label = row.get("workDate", f"{row.get('index')}行目")
             
-            s_h = _safe_str(row.get("start_h")).strip()
-            s_m = _safe_str(row.get("start_m")).strip()
-            e_h = _safe_str(row.get("end_h")).strip()
-            e_m = _safe_str(row.get("end_m")).strip()
-            r_h = _safe_str(row.get("rest_h")).strip()
-            r_m = _safe_str(row.get("rest_m")).strip()
-            m_h = _safe_str(row.get("mid_h")).strip()
-            m_m = _safe_str(row.get("mid_m")).strip()
-
-            if bool(s_h) != bool(s_m): error_messages.append(f"【{date_label}】開始時間の時・分不揃い")
-            if bool(e_h) != bool(e_m): error_messages.append(f"【{date_label}】終了時間の時・分不揃い")
-            if bool(r_h) != bool(r_m): error_messages.append(f"【{date_label}】休憩時間の時・分不揃い")
-            if bool(m_h) != bool(m_m): error_messages.append(f"【{date_label}】深夜時間の時・分不揃い")
-
-            has_start = bool(s_h) and bool(s_m)
-            has_end = bool(e_h) and bool(e_m)
+            # 各時刻項目の入力有無 (空白のみは未入力扱い)
+            s_h, s_m, e_h, e_m, r_h, r_m, m_h, m_m = (
+                _filled(row.get(k)) for k in _UI_VALUE_KEYS
+            )
+
+            if s_h != s_m: error_messages.append(f"【{date_label}】開始時間の時・分不揃い")
+            if e_h != e_m: error_messages.append(f"【{date_label}】終了時間の時・分不揃い")
+            if r_h != r_m: error_messages.append(f"【{date_label}】休憩時間の時・分不揃い")
+            if m_h != m_m: error_messages.append(f"【{date_label}】深夜時間の時・分不揃い")
+
+            has_start = s_h and s_m
+            has_end = e_h and e_m
             if has_start != has_end:
                 error_messages.append(f"【{date_label}】開始・終了時間はセットで入力してください")
 
-            if (bool(r_h) or bool(m_h)) and not has_start:
+            if (r_h or m_h) and not has_start:
                 error_messages.append(f"【{date_label}】休憩・深夜のみの入力はできません")
 
         return error_messages
@@ -293,25 +371,28 @@ class ScheduleHandler(BaseWebHandler):
             return str(val) if val is not None else ""
 
         # 1. フォーム上の全値を収集 (Hidden含む)
+        #    属性は tag.attrs (dict) から直接読み出す
+        #    確定チェック (.kakutei) は UIデータから改めて設定するため、収集時点で除外する
         for tag in form.find_all(['input', 'select', 'textarea']):
-            name = tag.get('name')
-            if not name: continue
-            
-            if tag.name == 'input' and tag.get('type') in ['checkbox', 'radio']:
-                if tag.has_attr('checked'):
-                    payload[name] = tag.get('value', 'on')
-                continue
+            attrs = tag.attrs
+            name = attrs.get('name')
+            if not name or name.endswith(".kakutei"): continue
+            tag_name = tag.name
             
-            val = tag.get('value', '')
-            if tag.name == 'textarea': val = tag.get_text()
-            if tag.name == 'select':
-                opt = tag.find('option', selected=True)
-                val = opt.get('value') if opt else (tag.find('option').get('value') if tag.find('option') else "")
+            if tag_name == 'input':
+                if attrs.get('type') in ('checkbox', 'radio'):
+                    if 'checked' in attrs:
+                        payload[name] = attrs.get('value', 'on')
+                    continue
+                val = attrs.get('value', '')
+            elif tag_name == 'select':
+                opt = tag.find('option', selected=True) or tag.find('option')
+                val = opt.get('value') if opt else ""
+            else:
+                # textarea の内容はテキストノード1つのみ
+                val = tag.string or ""
                 
             payload[name] = _safe_str(val)
-        
-        keys_to_remove = [k for k in payload.keys() if k.endswith(".kakutei")]
-        for k in keys_to_remove: del payload[k]
 
         # 2. UIデータで上書き
         today = date.today()
@@ -319,66 +400,61 @@ class ScheduleHandler(BaseWebHandler):
         for row in ui_data:
             i = row['index']
             base = f"workDataDetailList[{i}]"
+
+            # 参照する項目は最初に一度だけ文字列化しておく
+            r = {k: _safe_str(row.get(k)) for k in _PAYLOAD_ROW_KEYS}
+            r["workType"] = _safe_str(row.get("workType", "99"))
             
-            try:
-                w_date_str = row.get("workDate", "")
+            # 自動補完は未入力行のみが対象のため、安価な未入力判定を先に行い、
+            # 該当する行だけ日付の解析・休日判定を行う
+            is_empty_input = (not r["start_h"].strip()) and (r["workType"] == "99") and (not r["comment"].strip())
+            w_date_str = r["workDate"]
+            if is_empty_input and w_date_str:
                 w_date = None
+                # YYYY/MM/DD または MM/DD (数字以外を含む場合は例外を待たずに除外)
+                ymd = w_date_str.split("/", 2)
+                if all(part.isdecimal() for part in ymd):
+                    try:
+                        if len(ymd) == 3:
+                            w_date = date(int(ymd[0]), int(ymd[1]), int(ymd[2]))
+                        elif len(ymd) == 2:
+                            w_date = date(today.year, int(ymd[0]), int(ymd[1]))
+                    except ValueError as e:
+                        self.logger.warning(f"自動補完処理中に日付変換エラー (Row {i}): {e}")
+                else:
+                    self.logger.warning(f"自動補完処理中に日付変換エラー (Row {i}): {w_date_str}")
                 
-                if w_date_str:
-                    ymd = w_date_str.split("/")
-                    if len(ymd) == 3:
-                        w_date = date(int(ymd[0]), int(ymd[1]), int(ymd[2]))
-                    elif len(ymd) == 2:
-                        w_date = date(today.year, int(ymd[0]), int(ymd[1]))
-                
-                if w_date:
-                    s_h_chk = _safe_str(row.get("start_h")).strip()
-                    w_type_chk = _safe_str(row.get("workType", "99"))
-                    cmt_chk = _safe_str(row.get("comment")).strip()
-                    
-                    is_empty_input = (not s_h_chk) and (w_type_chk == "99") and (not cmt_chk)
-                    
-                    is_weekend = (w_date.weekday() >= 5) 
-                    is_shukujitsu = (row.get("shukujitsu") == "true")
-                    is_holiday = is_weekend or is_shukujitsu
-
-                    if (w_date < today) and is_holiday and is_empty_input:
-                        row["comment"] = "稼働なし"
+                if w_date and w_date < today:
+                    is_holiday = (r["shukujitsu"] == "true") or (w_date.weekday() > 4)
+                    if is_holiday:
+                        row["comment"] = r["comment"] = "稼働なし"
                         self.logger.info(f"自動補完: {w_date} に「稼働なし」をセットしました。")
 
-            except ValueError as e:
-                self.logger.warning(f"自動補完処理中に日付変換エラー (Row {i}): {e}")
-
-            if row.get("id"): payload[f"{base}.id"] = _safe_str(row.get("id"))
+            if r["id"]: payload[f"{base}.id"] = r["id"]
             
-            s_h = _safe_str(row.get("start_h"))
-            s_m = _safe_str(row.get("start_m"))
-            m_h = _safe_str(row.get("mid_h"))
-            m_m = _safe_str(row.get("mid_m"))
-            if m_h == "00": m_h = ""
-            if m_m == "00": m_m = ""
+            s_h = r["start_h"]
+            m_h = "" if r["mid_h"] == "00" else r["mid_h"]
+            m_m = "" if r["mid_m"] == "00" else r["mid_m"]
 
             mapping = {
-                "workStartTimeHour": s_h, "workStartTimeMinute": s_m,
-                "workEndTimeHour": _safe_str(row.get("end_h")), "workEndTimeMinute": _safe_str(row.get("end_m")),
-                "restTimeHour": _safe_str(row.get("rest_h")), "restTimeMinute": _safe_str(row.get("rest_m")),
+                "workStartTimeHour": s_h, "workStartTimeMinute": r["start_m"],
+                "workEndTimeHour": r["end_h"], "workEndTimeMinute": r["end_m"],
+                "restTimeHour": r["rest_h"], "restTimeMinute": r["rest_m"],
                 "midnightTimeHour": m_h, "midnightTimeMinute": m_m,
-                "workType": _safe_str(row.get("workType", "99")),
-                "comment": _safe_str(row.get("comment"))
+                "workType": r["workType"],
+                "comment": r["comment"]
             }
             
             for k, v in mapping.items():
                 payload[f"{base}.{k}"] = v
             
             has_time = bool(s_h and s_h.strip())
-            has_cmt = bool(row.get("comment"))
+            has_cmt = bool(r["comment"])
             has_type = bool(mapping["workType"] and mapping["workType"] != "99")
             
             if has_time or has_cmt or has_type:
                 payload[f"{base}.kakutei"] = "true"
 
-        for k in list(payload.keys()):
-            if payload[k] is None: payload[k] = ""
         payload["register"] = "登録"
         
         return payload
@@ -392,7 +468,7 @@ class ScheduleHandler(BaseWebHandler):
         Returns:
             str: 抽出されたエラーメッセージ。
         """
-        soup = BeautifulSoup(html_text, 'html.parser')
+        soup = BeautifulSoup(html_text, 'lxml', parse_only=_CLASS_ERROR_STRAINER)
         err_msgs = []
         for err in soup.find_all(class_="error"):
             t = err.get_text(strip=True)
@@ -400,7 +476,8 @@ class ScheduleHandler(BaseWebHandler):
         
         if not err_msgs:
             try:
-                err_ul = soup.find("ul", style=re.compile(r"color:\s*red", re.I))
+                red_soup = BeautifulSoup(html_text, 'lxml', parse_only=_RED_LIST_STRAINER)
+                err_ul = red_soup.find("ul", style=_ERR_COLOR_RE)
                 if err_ul:
                     for li in err_ul.find_all("li"):
                         err_msgs.append(li.get_text(strip=True))
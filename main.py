@@ -56,6 +56,7 @@ class TimeCardApp:
             expand=True,
         )
 
+        self.page.on_disconnect = lambda e: self.schedule_view.release_session()
         self.page.add(self.tabs)
 
     def navigate_to(self, index: int) -> None:
@@ -82,7 +83,10 @@ class TimeCardApp:
         idx = e.control.selected_index
         if idx == 2:
             self.schedule_view.handle_fetch_data()
-        elif idx == 3:
+            return
+        # 勤務表作成タブを離れたらログインセッションを閉じる
+        self.schedule_view.release_session()
+        if idx == 3:
             self.estimate_view.recalc_workdays("cur")
             self.estimate_view.recalc_workdays("nxt")
 
@@ -0,0 +1,60 @@
+# --- test_main_controller.py ---
+# 役割: main_controller の認証情報保存 (_save_credentials_if_changed) を確認する
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    from core import main_controller
+    from utils.encryption_utils import decrypt
+    MODULES_AVAILABLE = main_controller.CRYPTOGRAPHY_AVAILABLE
+except ImportError:
+    MODULES_AVAILABLE = False
+
+@unittest.skipUnless(MODULES_AVAILABLE, "依存ライブラリ (cryptography 等) がインストールされていません")
+class SaveCredentialsTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.env_path = tempfile.mkstemp(suffix=".env")
+        os.close(fd)
+        self.addCleanup(os.remove, self.env_path)
+
+    def _read_env(self):
+        with open(self.env_path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_plaintext_in_env_is_encrypted(self):
+        # .env に平文で直接記入された値は、入力値と同じでも暗号化して保存し直す
+        with open(self.env_path, "w", encoding="utf-8") as f:
+            f.write("MY_LOGIN_ID='user01'\n")
+        with mock.patch.dict(os.environ, {"MY_LOGIN_ID": "user01"}):
+            main_controller._save_credentials_if_changed(self.env_path, {"MY_LOGIN_ID": "user01"})
+            stored = os.environ["MY_LOGIN_ID"]
+
+        self.assertTrue(stored.startswith("gAAAAA"))
+        self.assertEqual(decrypt(stored), "user01")
+        self.assertIn(f"MY_LOGIN_ID='{stored}'", self._read_env())
+
+    def test_unchanged_ciphertext_is_not_rewritten(self):
+        stored = main_controller.encrypt("user01")
+        with open(self.env_path, "w", encoding="utf-8") as f:
+            f.write(f"MY_LOGIN_ID='{stored}'\n")
+        with mock.patch.dict(os.environ, {"MY_LOGIN_ID": stored}), \
+                mock.patch.object(main_controller, "set_keys") as set_keys:
+            main_controller._save_credentials_if_changed(self.env_path, {"MY_LOGIN_ID": "user01"})
+
+        set_keys.assert_not_called()
+
+    def test_empty_values_skip_decrypt(self):
+        with mock.patch.dict(os.environ, {"MY_PASSWORD": ""}), \
+                mock.patch.object(main_controller, "decrypt") as decrypt_mock, \
+                mock.patch.object(main_controller, "set_keys") as set_keys:
+            main_controller._save_credentials_if_changed(self.env_path, {"MY_PASSWORD": ""})
+
+        decrypt_mock.assert_not_called()
+        set_keys.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,46 @@
+# --- test_payslip_view.py ---
+# 役割: PayslipView.render_result の描画分岐を確認する
+
+import unittest
+
+try:
+    from views.payslip_view import PayslipView
+    FLET_AVAILABLE = True
+except ImportError:
+    FLET_AVAILABLE = False
+
+def _result(final_data_ui, bonus_data_ui):
+    """run_main_logic の成功時と同じ形の結果を返します (サマリーの合計値は常に入る)。"""
+    total_bonus = float(sum(b.get("総支給額", 0) for b in bonus_data_ui))
+    return {
+        "final_data_ui": final_data_ui,
+        "bonus_data_ui": bonus_data_ui,
+        "summary_data_rekigun": {"total_pay": total_bonus, "total_net_pay": total_bonus, "total_bonus": total_bonus},
+        "summary_nendo_overtime": 0.0,
+    }
+
+@unittest.skipUnless(FLET_AVAILABLE, "flet がインストールされていません")
+class RenderResultTest(unittest.TestCase):
+
+    def setUp(self):
+        self.view = PayslipView(None)
+        # ページに配置していないため、個別の update() を送信させない
+        self.view._batching = True
+
+    def test_out_of_range_year_shows_placeholder(self):
+        self.view.render_result(_result([], []), 1990)
+
+        controls = self.view.payslip_result_container.controls
+        self.assertEqual(len(controls), 1)
+        self.assertEqual(controls[0].value, "データがありません")
+
+    def test_year_with_bonus_rows_shows_summary(self):
+        bonus = [{"支給日": "令和07年06月10日", "総支給額": 300000, "差引支給額": 240000}]
+        self.view.render_result(_result([], bonus), 2025)
+
+        controls = self.view.payslip_result_container.controls
+        self.assertIn(self.view._metric_cards_row, controls)
+        self.assertIn(self.view._bonus_section, controls)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
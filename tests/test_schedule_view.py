@@ -0,0 +1,82 @@
+# --- test_schedule_view.py ---
+# 役割: ScheduleView のログインセッションのキャッシュ (_get_handler) を確認する
+
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+try:
+    from views import schedule_view
+    FLET_AVAILABLE = True
+except ImportError:
+    FLET_AVAILABLE = False
+
+@unittest.skipUnless(FLET_AVAILABLE, "flet がインストールされていません")
+class HandlerCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        # 画面は組み立てず、_get_handler が参照する属性のみを用意する
+        self.view = schedule_view.ScheduleView.__new__(schedule_view.ScheduleView)
+        self.view.settings_view = SimpleNamespace(login_id="user01", login_pw="pw01")
+        self.view._handler_cache = None
+        self.view._handler_lock = threading.Lock()
+
+        self.handlers = []
+        def make_handler(root_dir):
+            handler = mock.Mock()
+            handler.login.return_value = (True, "ログイン成功")
+            self.handlers.append(handler)
+            return handler
+        patcher = mock.patch.object(schedule_view, "ScheduleHandler", side_effect=make_handler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.now = 1000.0
+        clock = mock.patch.object(schedule_view.time, "monotonic", side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_reuses_handler_within_ttl(self):
+        first, _, reused_first = self.view._get_handler()
+        self.now += self.view.HANDLER_TTL_SEC - 1
+        second, _, reused_second = self.view._get_handler()
+
+        self.assertIs(first, second)
+        self.assertFalse(reused_first)
+        self.assertTrue(reused_second)
+        self.assertEqual(len(self.handlers), 1)
+
+    def test_expired_handler_is_closed_and_replaced(self):
+        first = self.view._get_handler()[0]
+        self.now += self.view.HANDLER_TTL_SEC
+        second, _, reused = self.view._get_handler()
+
+        self.assertIsNot(first, second)
+        self.assertFalse(reused)
+        first.close.assert_called_once_with()
+        second.close.assert_not_called()
+
+    def test_credentials_change_drops_handler(self):
+        first = self.view._get_handler()[0]
+        self.view.settings_view.login_id = "user02"
+        second, _, reused = self.view._get_handler()
+
+        self.assertIsNot(first, second)
+        self.assertFalse(reused)
+        first.close.assert_called_once_with()
+        second.login.assert_called_once_with("user02", "pw01")
+
+    def test_login_failure_closes_handler_without_caching(self):
+        with mock.patch.object(schedule_view, "ScheduleHandler") as handler_cls:
+            handler = handler_cls.return_value
+            handler.login.return_value = (False, "ログイン失敗")
+            result, msg, _ = self.view._get_handler()
+
+        self.assertIsNone(result)
+        self.assertEqual(msg, "ログイン失敗")
+        handler.close.assert_called_once_with()
+        self.assertIsNone(self.view._handler_cache)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
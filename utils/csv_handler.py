@@ -2,15 +2,23 @@
 # 役割: CSVファイルの読み込み・書き込みを担当する
 # rev: Merge Logic Integrated
 
+import contextlib
 import logging
 import os
 import csv
 import re 
+import stat
+import tempfile
 from datetime import datetime 
+from functools import lru_cache
 from typing import List, Set, Tuple, Dict, Any, Union, Optional
 
 logger = logging.getLogger(__name__)
 
+# 日付文字列の解析用 (令和XX年XX月XX日 / 令和XX年XX月)
+_RE_REIWA_FULL = re.compile(r'令和(\d+)年(\d+)月(\d+)日')
+_RE_REIWA_MONTH = re.compile(r'令和(\d+)年(\d+)月')
+
 def _safe_convert_to_float(value_str: Any, default_val: Any = None) -> Optional[float]:
     """数値変換ヘルパー"""
     if value_str == 'N/A' or value_str is None or value_str == "":
@@ -39,19 +47,22 @@ def load_existing_csv(csv_path: str, key_name: str = "年月日") -> Tuple[List[
             # 給与・賞与共通で数値変換したいキー候補
             target_int_keys = ['総支給額', '差引支給額', '賞与額', '控除合計', '所得税', '社会保険料計']
             target_float_keys = ['総時間外', '有給消化時間', '有給使用日数', '有給残日数']
+
+            # このCSVに存在する列だけに絞り込み、行ごとの存在チェックを省く
+            fields = set(reader.fieldnames or [])
+            present_int_keys = [k for k in target_int_keys if k in fields]
+            present_float_keys = [k for k in target_float_keys if k in fields]
             
             for row in reader:
                 # 整数変換
-                for k in target_int_keys:
-                    if k in row:
-                        try: row[k] = int(str(row[k]).replace(',', ''))
-                        except: row[k] = 0
+                for k in present_int_keys:
+                    v = row[k]
+                    try: row[k] = int(v.replace(',', '')) if v else 0
+                    except (ValueError, TypeError, AttributeError): row[k] = 0
                 
                 # 浮動小数点変換
-                for k in target_float_keys:
-                    if k in row:
-                        legacy_val = row.get(k)
-                        row[k] = _safe_convert_to_float(legacy_val, default_val=None)
+                for k in present_float_keys:
+                    row[k] = _safe_convert_to_float(row[k], default_val=None)
 
                 data_list.append(row)
                 
@@ -72,30 +83,59 @@ def load_existing_csv(csv_path: str, key_name: str = "年月日") -> Tuple[List[
         logger.error(f"CSV読込エラー: {e}")
         return [], set()
 
-def _sort_key_for_csv(item: Dict[str, Any]) -> datetime:
-    """日付ソートキー生成"""
-    date_str = item.get('年月日') or item.get('支給日', '')
-    
+@lru_cache(maxsize=4096)
+def _date_sort_value(date_str: str) -> int:
+    """日付文字列を YYYYMMDD 形式の整数に変換 (解析不可は 0)。
+
+    同じ日付文字列はソートのたびに繰り返し渡されるため、結果をキャッシュする。
+    """
+    # 日付は必ず「令和」で始まるため、それ以外は正規表現を使わずに除外する
+    if not date_str or not date_str.startswith('令和'):
+        return 0
+
     # 1. 令和XX年XX月XX日 (賞与)
-    match_full = re.search(r'令和(\d+)年(\d+)月(\d+)日', date_str)
+    match_full = _RE_REIWA_FULL.match(date_str)
     if match_full:
+        y = int(match_full.group(1)) + 2018
+        m = int(match_full.group(2))
+        d = int(match_full.group(3))
         try:
-            y = int(match_full.group(1)) + 2018
-            m = int(match_full.group(2))
-            d = int(match_full.group(3))
-            return datetime(y, m, d)
-        except: pass
+            datetime(y, m, d) # 妥当な日付かを検証
+            return y * 10000 + m * 100 + d
+        except ValueError: pass
 
     # 2. 令和XX年XX月 (給与)
-    match_month = re.search(r'令和(\d+)年(\d+)月', date_str)
+    match_month = _RE_REIWA_MONTH.match(date_str)
     if match_month:
+        y = int(match_month.group(1)) + 2018
+        m = int(match_month.group(2))
         try:
-            y = int(match_month.group(1)) + 2018
-            m = int(match_month.group(2))
-            return datetime(y, m, 1)
-        except: pass
+            datetime(y, m, 1)
+            return y * 10000 + m * 100 + 1
+        except ValueError: pass
         
-    return datetime.min
+    return 0
+
+def _sort_key_for_csv(item: Dict[str, Any]) -> int:
+    """日付ソートキー生成 (YYYYMMDD 形式の整数)"""
+    return _date_sort_value(item.get('年月日') or item.get('支給日', ''))
+
+CSV_WRITE_BUFFER_SIZE = 1 << 20
+
+# 作成済み (存在確認済み) の出力ディレクトリ
+_KNOWN_DIRS: Set[str] = set()
+
+def _ensure_dir(path: str) -> None:
+    """ディレクトリを作成する (確認済みのパスは再確認しない)"""
+    if path in _KNOWN_DIRS:
+        return
+    os.makedirs(path, exist_ok=True)
+    _KNOWN_DIRS.add(path)
+
+def _iter_row_values(data_list: List[Dict[str, Any]], headers: List[str]):
+    """行データをヘッダー順の値リストに変換するジェネレータ (ヘッダーに無いキーは無視、欠損は空文字)"""
+    for row in data_list:
+        yield [row.get(h, "") for h in headers]
 
 def save_to_csv(
     data_list: List[Dict[str, Any]], 
@@ -107,7 +147,7 @@ def save_to_csv(
     if not data_list: return None
         
     output_dir = os.path.join(root_dir, "output")
-    os.makedirs(output_dir, exist_ok=True)
+    _ensure_dir(output_dir)
     csv_abs = os.path.join(output_dir, csv_filename)
     csv_rel = os.path.join("output", csv_filename)
     
@@ -124,10 +164,22 @@ def save_to_csv(
     try:
         sorted_data = sorted(data_list, key=_sort_key_for_csv)
         
-        with open(csv_abs, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.DictWriter(f, fieldnames=headers, extrasaction='ignore') 
-            writer.writeheader()
-            writer.writerows(sorted_data)
+        # 一時ファイルに書き出してから置き換え、書き込み途中の異常終了で既存CSVが壊れないようにする
+        # (一時ファイル名は mkstemp で一意にし、同時に保存しても互いの一時ファイルを上書きしない)
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix=csv_filename + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8-sig', buffering=CSV_WRITE_BUFFER_SIZE) as f:
+                writer = csv.writer(f)
+                writer.writerow(headers)
+                writer.writerows(_iter_row_values(sorted_data, headers))
+            # mkstemp は 0600 で作成するため、既存CSVの権限を引き継ぐ
+            with contextlib.suppress(FileNotFoundError):
+                os.chmod(tmp_path, stat.S_IMODE(os.stat(csv_abs).st_mode))
+            os.replace(tmp_path, csv_abs)
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
             
         logger.info(f"CSV保存完了: {csv_abs} ({len(sorted_data)}件)")
         return csv_rel
@@ -136,6 +188,58 @@ def save_to_csv(
         logger.error(f"CSV保存エラー: {e}")
         return None
 
+def append_to_csv(
+    existing_data: List[Dict[str, Any]],
+    new_data: List[Dict[str, Any]],
+    root_dir: str,
+    csv_filename: str,
+    key_order: Optional[List[str]] = None
+) -> Optional[str]:
+    """CSV追記保存 (新規データのみ書き込み)
+
+    既存CSVの末尾に新規行だけを追記する。新規行が既存データの最終行より
+    前の日付を含む場合は、ソート順を保つため save_to_csv による全件保存に切り替える。
+    """
+    if not new_data: return None
+
+    if existing_data:
+        last_key = _sort_key_for_csv(existing_data[-1])
+        if any(_sort_key_for_csv(item) < last_key for item in new_data):
+            logger.info("append_to_csv: 既存データより前の日付を含むため全件保存します")
+            return save_to_csv(existing_data + new_data, root_dir, csv_filename, key_order=key_order)
+
+    output_dir = os.path.join(root_dir, "output")
+    _ensure_dir(output_dir)
+    csv_abs = os.path.join(output_dir, csv_filename)
+    csv_rel = os.path.join("output", csv_filename)
+
+    headers = key_order or [
+        '年月日', '総支給額', '差引支給額',
+        '総時間外', '有給消化時間', '有給使用日数', '有給残日数'
+    ]
+
+    try:
+        # 既存ファイルがあれば、そのヘッダーに列を揃えて追記する
+        has_content = os.path.exists(csv_abs) and os.path.getsize(csv_abs) > 0
+        if has_content:
+            with open(csv_abs, 'r', newline='', encoding='utf-8-sig') as f:
+                headers = next(csv.reader(f), None) or headers
+
+        sorted_new = sorted(new_data, key=_sort_key_for_csv)
+        # utf-8-sig でも追記位置が先頭でなければBOMは書き込まれない
+        with open(csv_abs, 'a', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            if not has_content:
+                writer.writerow(headers)
+            writer.writerows(_iter_row_values(sorted_new, headers))
+
+        logger.info(f"CSV追記完了: {csv_abs} (+{len(sorted_new)}件)")
+        return csv_rel
+
+    except Exception as e:
+        logger.error(f"CSV追記エラー: {e}")
+        return None
+
 def merge_and_save_csv(
     new_data: List[Dict[str, Any]], 
     root_dir: str, 
@@ -1,13 +1,15 @@
 # --- date_utils.py ---
-# 役割: 処理対象月のリスト生成を担当する
+# 役割: 処理対象月のリスト生成と、日付文字列の照合用の変換を担当する
 
 import datetime
 import logging
-from typing import Set
+from functools import lru_cache
+from typing import FrozenSet, Optional, Set
 
 logger = logging.getLogger(__name__)
 
-def generate_target_months(today: datetime.date, ui_year: int) -> Set[str]:
+@lru_cache(maxsize=32)
+def generate_target_months(today: datetime.date, ui_year: int) -> FrozenSet[str]:
     """
     指定された年（UIで選択された年）に基づいて、処理対象月のセットを生成する。
     
@@ -23,7 +25,8 @@ def generate_target_months(today: datetime.date, ui_year: int) -> Set[str]:
         ui_year (int): ユーザーがUIで指定した西暦年。
 
     Returns:
-        Set[str]: 処理対象月の年月プレフィックス (例: "令和05年03月") のセット。
+        FrozenSet[str]: 処理対象月の年月プレフィックス (例: "令和05年03月") のセット。
+            結果はキャッシュされるため、変更不可の frozenset で返す。
     """
     target_set: Set[str] = set() 
     
@@ -75,9 +78,10 @@ def generate_target_months(today: datetime.date, ui_year: int) -> Set[str]:
             current_month = 1
             current_year += 1
             
-    return target_set
+    return frozenset(target_set)
 
-def generate_target_months_for_full_scan(today: datetime.date) -> Set[str]:
+@lru_cache(maxsize=32)
+def generate_target_months_for_full_scan(today: datetime.date) -> FrozenSet[str]:
     """
     全期間スキャン用の処理対象月セットを生成する (2019年1月～当月/前月)。
     
@@ -89,7 +93,8 @@ def generate_target_months_for_full_scan(today: datetime.date) -> Set[str]:
         today (datetime.date): 実行日の日付オブジェクト。
 
     Returns:
-        Set[str]: 処理対象月の年月プレフィックス (例: "令和05年03月") のセット。
+        FrozenSet[str]: 処理対象月の年月プレフィックス (例: "令和05年03月") のセット。
+            結果はキャッシュされるため、変更不可の frozenset で返す。
     """
     target_set: Set[str] = set() 
     logger.info("generate_target_months_for_full_scan: 全期間スキャンが実行されました。")
@@ -130,4 +135,22 @@ def generate_target_months_for_full_scan(today: datetime.date) -> Set[str]:
             current_month = 1
             current_year += 1
             
-    return target_set
\ No newline at end of file
+    return frozenset(target_set)
+
+def month_day_key(date_str: str) -> Optional[str]:
+    """
+    日付文字列 ("YYYY/MM/DD", "YYYY-MM-DD", "M/D" など) を照合用の "MM/DD" に変換する。
+
+    Args:
+        date_str (str): 変換する日付文字列。
+
+    Returns:
+        Optional[str]: ゼロ埋めした "MM/DD"。変換できない場合は None。
+    """
+    parts = date_str.replace("-", "/").split("/")
+    if len(parts) < 2:
+        return None
+    try:
+        return f"{int(parts[-2]):02d}/{int(parts[-1]):02d}"
+    except ValueError:
+        return None
\ No newline at end of file
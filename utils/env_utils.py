@@ -0,0 +1,83 @@
+# --- env_utils.py ---
+# 役割: .env への設定値の書き込みをまとめて行う
+# dotenv.set_key はキー1つごとに .env 全体を読み直して書き換えるため、
+# 複数キーを保存する場合は set_keys で1回の書き換えにまとめる。
+
+import logging
+import os
+import stat
+import tempfile
+import threading
+from typing import Dict
+
+from dotenv.parser import parse_stream
+
+logger = logging.getLogger(__name__)
+
+# 設定画面の保存タイマーと取得処理のスレッドなどから同時に呼ばれても、
+# 読み込み→書き換え→置き換えの間に割り込まれてキーが失われないよう直列化する
+_ENV_WRITE_LOCK = threading.Lock()
+
+def _format_line(key: str, value: str) -> str:
+    """dotenv.set_key (quote_mode="always") と同じ形式の1行を生成する。"""
+    value_out = "'{}'".format(value.replace("'", "\\'"))
+    return f"{key}={value_out}\n"
+
+def set_keys(env_path: str, values: Dict[str, str]) -> bool:
+    """
+    複数のキーを .env に一度の書き換えで保存する。
+
+    既存のキーはその行を置き換え、存在しないキーは末尾に追記する。
+    それ以外の行 (コメント等) はそのまま残す。
+
+    Args:
+        env_path (str): .env ファイルのパス。
+        values (Dict[str, str]): 保存するキーと値。
+
+    Returns:
+        bool: 保存に成功した場合は True。
+    """
+    if not values:
+        return True
+
+    try:
+        with _ENV_WRITE_LOCK:
+            lines = []
+            written = set()
+            missing_newline = False
+            original_mode = None
+            if os.path.isfile(env_path):
+                original_mode = stat.S_IMODE(os.stat(env_path).st_mode)
+                with open(env_path, "r", encoding="utf-8") as source:
+                    for mapping in parse_stream(source):
+                        if mapping.key in values:
+                            lines.append(_format_line(mapping.key, values[mapping.key]))
+                            written.add(mapping.key)
+                            missing_newline = False
+                        else:
+                            lines.append(mapping.original.string)
+                            missing_newline = not mapping.original.string.endswith("\n")
+
+            rest = [_format_line(k, v) for k, v in values.items() if k not in written]
+            if rest and missing_newline:
+                lines.append("\n")
+            lines.extend(rest)
+
+            # 一時ファイルに書き出してから置き換える (書き込み途中で .env を壊さない)
+            env_dir = os.path.dirname(os.path.abspath(env_path))
+            fd, tmp_path = tempfile.mkstemp(dir=env_dir, prefix=".env.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as dest:
+                    dest.writelines(lines)
+                # mkstemp は 0600 で作成するため、既存の .env の権限を引き継ぐ
+                if original_mode is not None:
+                    os.chmod(tmp_path, original_mode)
+                os.replace(tmp_path, env_path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        return True
+
+    except Exception as e:
+        logger.error(f".env の保存に失敗しました: {e}")
+        return False
\ No newline at end of file
@@ -1,14 +1,69 @@
 # Version: 1.0
+import contextlib
 import json
 import os
-from typing import List
+import stat
+import tempfile
+from typing import Any, Dict, List
 from core.commons import logger, APP_BUNDLE_DIR
 
+# --- 外部ライブラリ (orjson) ---
+# 利用可能ならC実装の orjson を使い、無ければ標準の json にフォールバックする
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # 定数の定義
 DATA_DIR = os.path.join(APP_BUNDLE_DIR, "data")
 JSON_FILE_NAME = "special_holidays.json"
 JSON_PATH = os.path.join(DATA_DIR, JSON_FILE_NAME)
 
+# 読み込み結果のキャッシュ (ファイルの更新日時が変わらない限り再読込しない)
+_cache: Dict[str, Any] = {"mtime": None, "data": []}
+
+def _loads(raw: bytes) -> Any:
+    """JSONバイト列をデコードします。"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+def _dumps(data: Any) -> bytes:
+    """データを整形済みJSON (UTF-8) のバイト列にエンコードします。"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+def dumps_compact(data: Any) -> str:
+    """データを1行のJSON文字列 (非ASCII文字はそのまま) にエンコードします。
+
+    Args:
+        data (Any): エンコードするデータ。
+
+    Returns:
+        str: JSON文字列。
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+def load_json_file(path: str) -> Any:
+    """JSONファイルを読み込んでデコードします (orjson 利用可能時はそちらを使用)。
+
+    Args:
+        path (str): 読み込むJSONファイルのパス。
+
+    Returns:
+        Any: デコードされたデータ。
+
+    Raises:
+        OSError: ファイルの読み込みに失敗した場合。
+        json.JSONDecodeError: JSONとして不正な場合。
+    """
+    with open(path, "rb") as f:
+        return _loads(f.read())
+
 def ensure_data_dir_exists():
     """dataディレクトリが存在しない場合は作成します。"""
     if not os.path.exists(DATA_DIR):
@@ -23,20 +78,27 @@ def load_special_holidays() -> List[str]:
 
     Returns:
         List[str]: 日付文字列(YYYY-MM-DD)のリスト。読み込み失敗時は空リストを返します。
+            ファイルが前回読み込み時から更新されていなければ、キャッシュの内容 (コピー) を返します。
     """
-    if not os.path.exists(JSON_PATH):
+    try:
+        mtime = os.path.getmtime(JSON_PATH)
+    except OSError:
         logger.info(f"Special holidays file not found at: {JSON_PATH}")
         return []
 
+    if _cache["mtime"] == mtime:
+        return list(_cache["data"])
+
     try:
-        with open(JSON_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                logger.info(f"Loaded {len(data)} special holidays from {JSON_PATH}")
-                return data
-            else:
-                logger.warning(f"Invalid format in {JSON_PATH}: Expected a list.")
-                return []
+        data = load_json_file(JSON_PATH)
+        if isinstance(data, list):
+            logger.info(f"Loaded {len(data)} special holidays from {JSON_PATH}")
+            _cache["mtime"] = mtime
+            _cache["data"] = tuple(data)
+            return data
+        else:
+            logger.warning(f"Invalid format in {JSON_PATH}: Expected a list.")
+            return []
     except json.JSONDecodeError as e:
         logger.error(f"Failed to decode JSON from {JSON_PATH}: {e}")
         return []
@@ -54,10 +116,23 @@ def save_special_holidays(data: List[str]) -> bool:
         bool: 保存に成功した場合はTrue、失敗した場合はFalse。
     """
     ensure_data_dir_exists()
+    _cache["mtime"] = None
     
     try:
-        with open(JSON_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        # 一時ファイルに書き出してから置き換える (書き込み途中で既存ファイルを壊さない)
+        # (一時ファイル名は mkstemp で一意にし、同時に保存しても互いの一時ファイルを上書きしない)
+        fd, tmp_path = tempfile.mkstemp(dir=DATA_DIR, prefix=JSON_FILE_NAME + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_dumps(data))
+            # mkstemp は 0600 で作成するため、既存ファイルの権限を引き継ぐ
+            with contextlib.suppress(FileNotFoundError):
+                os.chmod(tmp_path, stat.S_IMODE(os.stat(JSON_PATH).st_mode))
+            os.replace(tmp_path, JSON_PATH)
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
         logger.info(f"Saved {len(data)} special holidays to {JSON_PATH}")
         return True
     except Exception as e:
@@ -1,34 +1,46 @@
 # v1.4 (Fix: Regex update to support "2025帰社会..." pattern)
-import pdfplumber
 import logging
 import re
 import datetime
 import os
-from typing import Optional
+from functools import lru_cache
+from typing import FrozenSet, Optional
 
 # ログ設定
 logger = logging.getLogger(__name__)
 
+# 年・数値抽出用の正規表現 (テーブルのセルごとに使うためモジュール読込時にコンパイル)
+# "2025年", "2025年度", "2025帰社" など ((?:\s*) は0文字以上の空白を許容)
+_YEAR_TEXT_RE = re.compile(r'(20[2-3]\d)(?:\s*(?:年|年度|帰社))')
+# ファイル名中の西暦4桁
+_YEAR_FILE_RE = re.compile(r'(20[2-3]\d)')
+# セル中の数値 (月・日)
+_DIGIT_RE = re.compile(r'(\d+)')
+
+# 表の抽出設定 (帰社会スケジュールは罫線付きの表のため、罫線のみから表を検出する)
+# 表の形式が変わった場合はここで調整する
+_TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+}
+
+# 正規化用の変換テーブル (康煕部首 -> 通常の漢字、各種空白は削除)
+_NORMALIZE_TABLE = str.maketrans('⽉⽇⽔⾦⼟⽊⽕', '月日水金土木火', ' 　\u2000\u2003')
+
+@lru_cache(maxsize=4096)
+def _normalize_str(text: str) -> str:
+    """normalize_text の本体 (表のセルは同じ値が繰り返し現れるため結果をキャッシュする)"""
+    return text.strip().translate(_NORMALIZE_TABLE)
+
 def normalize_text(text):
     """
     テキストの正規化を行う関数
     """
     if text is None:
         return ""
-    
-    replacements = {
-        '⽉': '月', '⽇': '日', '⽔': '水', '⾦': '金',
-        '⼟': '土', '⽊': '木', '⽕': '火',
-        ' ': ' ', ' ': ' ',
-    }
-    
-    text = text.strip()
-    for radical, standard in replacements.items():
-        text = text.replace(radical, standard)
-
-    text = text.replace(" ", "").replace("　", "")
-    return text
+    return _normalize_str(text)
 
+@lru_cache(maxsize=64)
 def extract_year_from_text(text: str) -> Optional[int]:
     """
     テキストから西暦（20xx年/年度/帰社...）を抽出する
@@ -37,13 +49,21 @@ def extract_year_from_text(text: str) -> Optional[int]:
         return None
     
     # パターン1: "2025年", "2025年度", "2025帰社" など
-    # (?:\s*) は0文字以上の空白を許容
-    match = re.search(r'(20[2-3]\d)(?:\s*(?:年|年度|帰社))', text)
+    match = _YEAR_TEXT_RE.search(text)
     if match:
         return int(match.group(1))
         
     return None
 
+def _cell_int(text: str) -> Optional[int]:
+    """
+    セル文字列から最初の数値を取り出す (数字のみのセルは正規表現を使わずに変換する)
+    """
+    if text.isdecimal():
+        return int(text)
+    match = _DIGIT_RE.search(text)
+    return int(match.group(1)) if match else None
+
 def extract_year_from_filename(path: str) -> Optional[int]:
     """
     ファイルパス（ファイル名）から西暦を抽出する
@@ -52,55 +72,76 @@ def extract_year_from_filename(path: str) -> Optional[int]:
         return None
     filename = os.path.basename(path)
     # ファイル名なら "2025" などの数字4桁があればそれを年とみなす
-    match = re.search(r'(20[2-3]\d)', filename)
+    match = _YEAR_FILE_RE.search(filename)
     if match:
         return int(match.group(1))
     return None
 
-def get_kishakai_dates(pdf_path: str, target_year: Optional[int] = None) -> set:
+def get_kishakai_dates(pdf_path: str, target_year: Optional[int] = None, max_pages: Optional[int] = None) -> FrozenSet[str]:
     """
     指定されたPDFを読み込み、スケジュール（帰社会）の日付リストを返します。
+
+    年は target_year > ファイル名 > PDF本文 > 現在の年 の順に決定します。
+    ファイル名から年が分かる場合は、ページ本文のテキスト抽出 (extract_text) を行いません。
+
+    一度読み終えた月が再び現れた (開始月に戻り、次の1年分が始まった) 時点で解析を打ち切ります。
+    1月始まり・4月始まり (年度) のどちらの並びでも、1周した時点で止まります。
+    max_pages を指定した場合は、先頭からそのページ数までのみ解析します。
     """
     if not os.path.exists(pdf_path):
         logger.warning(f"PDFファイルが見つかりません: {pdf_path}")
-        return set()
+        return frozenset()
 
     found_dates = set()
-    detected_year = None
+    detected_year = target_year
+    # 年が確定する前にテーブルを読み進めるため、(月, 日) の組で保持しておき最後に日付化する
+    month_days = set()
+
+    if detected_year is None:
+        # A. ファイル名から検索 (文字列への正規表現1回で済むため、本文の抽出より先に行う)
+        detected_year = extract_year_from_filename(pdf_path)
+        if detected_year:
+            logger.info(f"ファイル名から年を検出しました: {detected_year}年")
     
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            # --- 1. 年の自動検出フェーズ ---
-            if target_year is None:
-                # A. 本文テキストから検索
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    # 最初のページで見つかれば即終了
-                    detected_year = extract_year_from_text(text)
-                    if detected_year:
-                        logger.info(f"PDF本文から年を検出しました: {detected_year}年 (Pattern Match)")
-                        break
-                
-                # B. ファイル名から検索 (本文になかった場合)
-                if detected_year is None:
-                    detected_year = extract_year_from_filename(pdf_path)
-                    if detected_year:
-                        logger.info(f"ファイル名から年を検出しました: {detected_year}年")
-
-                # C. 現在の年 (最終手段)
-                if detected_year is None:
-                    detected_year = datetime.datetime.now().year
-                    logger.warning(f"年を検出できなかったため、現在の年({detected_year})を使用します")
-            else:
-                detected_year = target_year
+        # pdfplumber (pdfminer) は読み込みが重いため、PDFを実際に解析する時まで読み込まない
+        import pdfplumber
+    except ImportError:
+        logger.error("pdfplumber が見つかりません。PDFの解析を行えません。")
+        return frozenset()
 
-            logger.info(f"PDF解析開始: {pdf_path} (Base Year: {detected_year})")
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            logger.info(f"PDF解析開始: {pdf_path}")
 
-            # --- 2. テーブル解析フェーズ ---
+            # --- 年の検出とテーブル解析を1回のページ走査で行う ---
             current_month = None 
+            months_seen = set()
+            year_completed = False
 
             for i, page in enumerate(pdf.pages):
-                table = page.extract_table()
+                if max_pages is not None and i >= max_pages:
+                    logger.info(f"最大ページ数 ({max_pages}) に達したため解析を終了します")
+                    break
+
+                # B. 本文テキストから検索 (ファイル名から検出できなかった場合のみ。見つかった以降のページでは本文抽出を行わない)
+                if detected_year is None:
+                    detected_year = extract_year_from_text(page.extract_text())
+                    if detected_year:
+                        logger.info(f"PDF本文から年を検出しました: {detected_year}年 (Pattern Match)")
+
+                # 1周分を読み終えた後は、年の検出のみ続ける
+                if year_completed:
+                    if detected_year is not None:
+                        break
+                    continue
+
+                table = page.extract_table(_TABLE_SETTINGS)
+                # 抽出結果は通常のリストのため、ページのレイアウト解析結果はここで解放してメモリを抑える
+                try:
+                    page.flush_cache()
+                except AttributeError:
+                    pass
                 if not table:
                     continue
 
@@ -108,38 +149,54 @@ def get_kishakai_dates(pdf_path: str, target_year: Optional[int] = None) -> set:
                     if not row or len(row) < 2:
                         continue
 
-                    # 正規化
-                    row_texts = [normalize_text(cell) for cell in row]
-                    
-                    col_month = row_texts[0] # 月カラム
-                    col_date = row_texts[1]  # 日カラム
+                    # 正規化 (使用するのは先頭2列のみ)
+                    col_month = normalize_text(row[0]) # 月カラム
+                    col_date = normalize_text(row[1])  # 日カラム
 
                     # --- 月の判定 ---
-                    month_match = re.search(r'(\d+)', col_month)
-                    if month_match:
-                        current_month = int(month_match.group(1))
+                    month = _cell_int(col_month)
+                    if month is not None:
+                        # 読み終えた月が再び現れた場合は次の1年分のため、以降は読まない
+                        # (同じ月が続く行は、月の列が各行に記載されているレイアウトのため対象外)
+                        if month != current_month and month in months_seen:
+                            year_completed = True
+                            break
+                        current_month = month
+                        months_seen.add(month)
                     elif current_month is None:
                         continue
 
                     # --- 日の判定 ---
-                    day_match = re.search(r'(\d+)', col_date)
+                    day = _cell_int(col_date)
                     
-                    if current_month and day_match:
-                        day = int(day_match.group(1))
-                        try:
-                            # 簡易的な年生成
-                            dt = datetime.date(detected_year, current_month, day)
-                            date_str = dt.strftime("%Y/%m/%d")
-                            found_dates.add(date_str)
-                        except ValueError:
-                            continue
+                    if current_month and day is not None:
+                        month_days.add((current_month, day))
+
+                if year_completed:
+                    logger.info(f"1周分の月の読み込みが完了しました ({i + 1}ページ目)")
+                    if detected_year is not None:
+                        break
+
+        # C. 現在の年 (最終手段)
+        if detected_year is None:
+            detected_year = datetime.datetime.now().year
+            logger.warning(f"年を検出できなかったため、現在の年({detected_year})を使用します")
+
+        logger.info(f"PDF日付生成 (Base Year: {detected_year})")
+        for month, day in month_days:
+            try:
+                # 簡易的な年生成 (dateの生成は妥当性チェックのみ。文字列化はstrftimeを使わない)
+                datetime.date(detected_year, month, day)
+            except ValueError:
+                continue
+            found_dates.add(f"{detected_year:04d}/{month:02d}/{day:02d}")
 
         logger.info(f"抽出完了: {len(found_dates)}件の日付が見つかりました")
-        return found_dates
+        return frozenset(found_dates)
 
     except Exception as e:
         logger.error(f"PDF解析中にエラーが発生しました: {e}")
-        return set()
+        return frozenset()
 
 if __name__ == "__main__":
     # テスト用
@@ -55,16 +55,14 @@ def calculate_rekigun_summary(data_list_for_year: List[Dict[str, Any]]) -> Dict[
     指定された年のデータリストに基づき、暦年 (1-12月) の集計を行う。
     
     Notes:
-        この関数に渡されるリスト (data_list_for_year) は、
-        計算用に "N/A" が 0.0 に変換済みのリストであることを前提とする。
-        ただし、最新月の有給情報 (latest_*) は、呼び出し元 (main_controller) が
-        "N/A" を保持したオリジナルデータで上書きすることを想定し、
-        ここでは "N/A" (または 0.0) を設定する。
+        この関数に渡されるリスト (data_list_for_year) は "N/A" を保持した
+        オリジナルデータでよい。金額・時間外の合計は _sum_safe により
+        数値以外が無視されるため、呼び出し側での変換やコピーは不要。
+        最新月の有給情報 (latest_*) はオリジナルの値 ("N/A" を含む) をそのまま設定する。
 
     Args:
         data_list_for_year (List[Dict[str, Any]]): 
             集計対象のデータリスト (UI指定年/1年分)。
-            "N/A" は 0.0 に変換済みであること。
 
     Returns:
         Dict[str, Any]: 集計結果の辞書。
@@ -81,15 +79,14 @@ def calculate_rekigun_summary(data_list_for_year: List[Dict[str, Any]]) -> Dict[
         logger.info("calculate_rekigun_summary: 対象データが0件のため、デフォルト値を返します。")
         return default_summary
 
-    # --- 集計 (N/A は 0.0 変換済みのため、_sum_safe が安全に動作する) ---
+    # --- 集計 (_sum_safe が "N/A" 等の数値以外を無視する) ---
     total_pay = _sum_safe(item.get('総支給額', 0) for item in data_list_for_year)
     total_net_pay = _sum_safe(item.get('差引支給額', 0) for item in data_list_for_year)
-    total_overtime = _sum_safe(item.get('総時間外', 0) for item in data_list_for_year)
+    total_overtime = float(_sum_safe(item.get('総時間外', 0) for item in data_list_for_year))
     
     # --- 最新月の情報取得 ---
     # (data_list_for_year はソート済みであることを前提とする)
     latest_item = data_list_for_year[-1]
-    # "N/A" が 0.0 に変換されているため、ここで取得する値は 0.0 になる可能性がある
     latest_paid_leave_time = latest_item.get('有給消化時間', 'N/A')
     latest_paid_leave_used_days = latest_item.get('有給使用日数', 'N/A')
     latest_paid_leave_remaining_days = latest_item.get('有給残日数', 'N/A')
@@ -1,12 +1,18 @@
 # v2.0 (Feature: Support JSON file upload for Kishakai schedule)
 import flet as ft
+import asyncio
 import os
 import shutil
 import datetime
-import json
-from typing import Optional, Callable, Set, List
-from dotenv import set_key
+import threading
+from typing import Dict, FrozenSet, Optional, Callable, List, Tuple
 from core.commons import logger, ENV_PATH, ROOT_DIR
+from utils.env_utils import set_keys
+from utils.json_utils import load_json_file
+from utils.date_utils import month_day_key
+
+# JSON の日付 "YYYY-MM-DD" をキャッシュ形式 "YYYY/MM/DD" に変換するテーブル
+_JSON_DATE_TRANS = str.maketrans("-", "/")
 
 try:
     from utils.pdf_schedule_reader import get_kishakai_dates
@@ -25,7 +31,7 @@ class ScheduleActions(ft.Container):
         on_fetch (Optional[Callable]): データ取得ボタン押下時のコールバック関数。
         on_bulk_fill (Optional[Callable]): 一括入力ボタン押下時のコールバック関数。
         pdf_save_dir (str): ファイル（PDF/JSON）の保存先ディレクトリパス。
-        kishakai_dates_cache (Set[str]): 読み込まれた帰社会の日付セット（YYYY/MM/DD形式）。
+        kishakai_dates_cache (FrozenSet[str]): 読み込まれた帰社会の日付セット（YYYY/MM/DD形式）。
         kishakai_file_name (str): 現在設定されているファイル名。
         is_file_loaded (bool): ファイルの読み込み試行が完了しているかどうかのフラグ。
     """
@@ -52,12 +58,28 @@ class ScheduleActions(ft.Container):
         self.pdf_save_dir: str = os.path.join(ROOT_DIR, "data", "Internal_meeting")
         os.makedirs(self.pdf_save_dir, exist_ok=True)
         
-        self.kishakai_dates_cache: Set[str] = set()
+        self.kishakai_dates_cache: FrozenSet[str] = frozenset()
+        # kishakai_dates_cache を "MM/DD" に正規化したもの (_set_kishakai_dates で同時に更新する)
+        self._kishakai_md: FrozenSet[str] = frozenset()
         # 環境変数名は互換性のため KISHAKAI_PDF_NAME を継続使用するが、中身はJSONの場合もある
-        self.kishakai_file_name: str = os.getenv("KISHAKAI_PDF_NAME", "")
+        self.kishakai_file_name: str = ""
+        self._file_path: str = ""
+        self._file_ext: str = ""
+        self._set_kishakai_file(os.getenv("KISHAKAI_PDF_NAME", ""))
+
+        # 拡張子 -> 読み込み処理 (引数: ファイルパス, 対象年 / 戻り値: 日付セット)
+        self._loaders: Dict[str, Callable[[str, Optional[int]], FrozenSet[str]]] = {
+            ".json": lambda path, _year: self._load_from_json(path),
+            ".pdf": self._load_from_pdf,
+        }
         
         # 読み込み試行済みフラグ
         self.is_file_loaded: bool = False
+        # 最後に読み込みに成功したファイルの (パス, 対象年, 更新時刻, サイズ)
+        self._load_signature: Optional[Tuple] = None
+        # 日付キャッシュと _load_signature の反映を直列化する
+        # (読み込み結果の反映はイベントループと、取得処理のスレッドからの reload_pdf_dates の両方で行われるため)
+        self._load_lock = threading.Lock()
 
         # 初期化
         self.kishakai_initial_value: bool = False
@@ -98,8 +120,7 @@ class ScheduleActions(ft.Container):
         """
         current_month = datetime.datetime.now().strftime("%Y%m")
         try:
-            set_key(ENV_PATH, "KISHAKAI_IS_CHECKED", str(is_checked))
-            set_key(ENV_PATH, "KISHAKAI_LAST_MONTH", current_month)
+            set_keys(ENV_PATH, {"KISHAKAI_IS_CHECKED": str(is_checked), "KISHAKAI_LAST_MONTH": current_month})
         except Exception as e:
             logger.error(f"Failed to save kishakai status: {e}")
 
@@ -127,6 +148,7 @@ class ScheduleActions(ft.Container):
         )
         
         self.txt_file_status = ft.Text("ファイル未設定", size=12, color=ft.Colors.GREY)
+        self.ring_loading = ft.ProgressRing(width=14, height=14, stroke_width=2, visible=False)
 
         return ft.Row([
             ft.ElevatedButton("データ取得 (Web)", icon=ft.Icons.CLOUD_DOWNLOAD, on_click=self._handle_fetch_click),
@@ -137,6 +159,7 @@ class ScheduleActions(ft.Container):
                 content=ft.Row([
                     self.chk_kishakai,
                     self.btn_select_file,
+                    self.ring_loading,
                     self.txt_file_status
                 ], spacing=10, vertical_alignment=ft.CrossAxisAlignment.CENTER),
                 border=ft.border.all(1, ft.Colors.GREY_300),
@@ -155,6 +178,68 @@ class ScheduleActions(ft.Container):
 
     # --- ヘルパーメソッド ---
 
+    def _set_kishakai_file(self, file_name: str) -> None:
+        """帰社会ファイル名を設定し、保存先パスと拡張子を算出して保持します。
+
+        Args:
+            file_name (str): 保存先ディレクトリ内のファイル名。
+        """
+        self.kishakai_file_name = file_name
+        self._file_path = os.path.join(self.pdf_save_dir, file_name) if file_name else ""
+        self._file_ext = os.path.splitext(file_name)[1].lower()
+
+    def _set_kishakai_dates(self, dates: FrozenSet[str]) -> None:
+        """帰社会の日付キャッシュと、その "MM/DD" 正規化セットを更新します。
+
+        Args:
+            dates (FrozenSet[str]): 帰社会の日付セット（YYYY/MM/DD形式）。
+        """
+        self.kishakai_dates_cache = dates
+        self._kishakai_md = frozenset(md for md in map(month_day_key, dates) if md)
+
+    def _read_kishakai_file(self, target_year: Optional[int] = None) -> Optional[Tuple[Tuple, FrozenSet[str]]]:
+        """設定されたファイルを拡張子(.pdf/.json)に応じて解析し、(シグネチャ, 日付セット) を返します。
+
+        前回読み込み時からファイル(パス・更新時刻・サイズ)と対象年が変わっていなければ、
+        再解析せずに None を返します (既存のキャッシュを使う)。
+        キャッシュは書き換えないため、ワーカースレッドからも呼び出せます (反映は _apply_kishakai_result で行う)。
+
+        Args:
+            target_year (Optional[int], optional): 読み込む年(PDF用。JSONでは無視)。 Defaults to None.
+
+        Returns:
+            Optional[Tuple[Tuple, FrozenSet[str]]]: (シグネチャ, 日付セット)。再解析が不要な場合はNone。
+
+        Raises:
+            ImportError: PDF読み込みモジュールが無効な場合。
+            ValueError: サポートされていない形式の場合。
+        """
+        path, ext = self._file_path, self._file_ext
+        loader = self._loaders.get(ext)
+        if loader is None:
+            raise ValueError(f"サポートされていない形式です: {ext}")
+
+        st = os.stat(path)
+        year_key = target_year if ext == ".pdf" else None
+        sig = (path, year_key, st.st_mtime_ns, st.st_size)
+        if sig == self._load_signature and self.kishakai_dates_cache:
+            return None
+
+        return sig, loader(path, target_year)
+
+    def _apply_kishakai_result(self, result: Optional[Tuple[Tuple, FrozenSet[str]]]) -> None:
+        """_read_kishakai_file の結果を日付キャッシュと _load_signature に反映します。
+
+        Args:
+            result (Optional[Tuple[Tuple, FrozenSet[str]]]): (シグネチャ, 日付セット)。Noneの場合は何もしません。
+        """
+        if result is None:
+            return
+        sig, dates = result
+        with self._load_lock:
+            self._set_kishakai_dates(dates)
+            self._load_signature = sig
+
     def _update_file_status(self, run_update: bool = True) -> None:
         """ファイルの状態表示テキストを更新します。
 
@@ -177,10 +262,14 @@ class ScheduleActions(ft.Container):
         if run_update:
             self.txt_file_status.update()
 
-    def _load_kishakai_data(self, run_update: bool = True) -> None:
-        """設定されたファイルから帰社会データをロードします。
-        
-        拡張子(.pdf/.json)に応じて処理を分岐します。
+    def _can_load_kishakai_file(self, run_update: bool) -> bool:
+        """帰社会ファイルが設定済みで存在するかを確認します。
+
+        Args:
+            run_update (bool): 確認できなかった場合にメッセージ表示・UI更新を行うか。
+
+        Returns:
+            bool: 読み込み可能な場合はTrue。
         """
         if not self.kishakai_file_name:
             if run_update:
@@ -188,61 +277,112 @@ class ScheduleActions(ft.Container):
                 self.chk_kishakai.value = False
                 self.chk_kishakai.update()
                 self._update_file_status(run_update=True)
-            return
+            return False
 
-        file_path = os.path.join(self.pdf_save_dir, self.kishakai_file_name)
-        if not os.path.exists(file_path):
+        if not os.path.exists(self._file_path):
             if run_update:
                 self.show_message("設定されたファイルが見つかりません。", ft.Colors.RED)
                 self._update_file_status(run_update=True)
-            return
+            return False
 
-        # 拡張子による分岐
-        ext = os.path.splitext(self.kishakai_file_name)[1].lower()
+        return True
 
-        try:
-            if ext == ".json":
-                self._load_from_json(file_path)
-            elif ext == ".pdf":
-                if get_kishakai_dates:
-                    # PDF読み込み (自動検出ロジック)
-                    self.kishakai_dates_cache = get_kishakai_dates(file_path)
-                else:
-                    raise ImportError("PDF読み込みモジュールが無効です")
-            else:
-                raise ValueError(f"サポートされていない形式です: {ext}")
+    def _finish_kishakai_load(self, error: Optional[Exception], run_update: bool) -> None:
+        """読み込み結果に応じて状態と表示を更新します。
 
+        Args:
+            error (Optional[Exception]): 読み込み時に発生した例外。成功時はNone。
+            run_update (bool): メッセージ表示・UI更新を行うか。
+        """
+        if error is None:
             self.is_file_loaded = True
             if run_update:
                 self.show_message(f"日程を読み込みました: {len(self.kishakai_dates_cache)}件")
             self._update_file_status(run_update=run_update)
-
-        except Exception as ex:
-            logger.error(f"File Read Error: {ex}")
+        else:
+            logger.error(f"File Read Error: {error}")
             self.is_file_loaded = False
             if run_update:
-                self.show_message(f"読み込みエラー: {ex}", ft.Colors.RED)
+                self.show_message(f"読み込みエラー: {error}", ft.Colors.RED)
+                self._update_file_status(run_update=True)
+
+    def _load_kishakai_data(self, run_update: bool = True) -> None:
+        """設定されたファイルから帰社会データをロードします。
+        
+        拡張子(.pdf/.json)に応じて処理を分岐します。
+        """
+        if not self._can_load_kishakai_file(run_update):
+            return
 
-    def _load_from_json(self, path: str) -> None:
+        try:
+            self._apply_kishakai_result(self._read_kishakai_file())
+        except Exception as ex:
+            self._finish_kishakai_load(ex, run_update)
+            return
+        self._finish_kishakai_load(None, run_update)
+
+    async def _load_kishakai_data_async(self) -> None:
+        """_load_kishakai_data の非同期版 (イベントハンドラ用)。
+
+        PDFの解析は数秒かかることがあるため、ワーカースレッドで実行し、
+        その間はステータス欄にインジケータを表示してUIを止めないようにします。
+        ワーカースレッドは解析結果を返すだけで、キャッシュへの反映はイベントループ側で行います。
+        """
+        if not self._can_load_kishakai_file(run_update=True):
+            return
+
+        self.ring_loading.visible = True
+        self.txt_file_status.value = "読み込み中..."
+        self.txt_file_status.color = ft.Colors.GREY
+        self.ring_loading.update()
+        self.txt_file_status.update()
+
+        error: Optional[Exception] = None
+        try:
+            result = await asyncio.to_thread(self._read_kishakai_file)
+            self._apply_kishakai_result(result)
+        except Exception as ex:
+            error = ex
+        finally:
+            self.ring_loading.visible = False
+            self.ring_loading.update()
+        self._finish_kishakai_load(error, run_update=True)
+
+    def _load_from_pdf(self, path: str, target_year: Optional[int] = None) -> FrozenSet[str]:
+        """PDFファイルから帰社会の日付を読み込みます。
+
+        Args:
+            path (str): PDFファイルのパス。
+            target_year (Optional[int], optional): 読み込む年。未指定なら自動検出。 Defaults to None.
+
+        Returns:
+            FrozenSet[str]: 帰社会の日付セット（YYYY/MM/DD形式）。
+
+        Raises:
+            ImportError: PDF読み込みモジュールが無効な場合。
+        """
+        if not get_kishakai_dates:
+            raise ImportError("PDF読み込みモジュールが無効です")
+        return get_kishakai_dates(path, target_year)
+
+    def _load_from_json(self, path: str) -> FrozenSet[str]:
         """JSONファイルから日付リストを読み込みます。
 
         Format: ["YYYY-MM-DD", ...] -> Cache: {"YYYY/MM/DD", ...}
+
+        Returns:
+            FrozenSet[str]: 帰社会の日付セット（YYYY/MM/DD形式）。
         """
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_json_file(path)
             
         if not isinstance(data, list):
             raise ValueError("JSON形式が無効です。リスト形式である必要があります。")
             
-        # 正規化してセットに格納
-        self.kishakai_dates_cache = set()
-        for date_str in data:
-            if isinstance(date_str, str):
-                # "YYYY-MM-DD" -> "YYYY/MM/DD"
-                normalized = date_str.replace("-", "/")
-                self.kishakai_dates_cache.add(normalized)
+        # 正規化してセットに格納 ("YYYY-MM-DD" -> "YYYY/MM/DD")
+        dates = frozenset(s.translate(_JSON_DATE_TRANS) for s in data if isinstance(s, str))
         
-        logger.info(f"Loaded {len(self.kishakai_dates_cache)} dates from JSON.")
+        logger.info(f"Loaded {len(dates)} dates from JSON.")
+        return dates
 
     # --- イベントハンドラ ---
     
@@ -256,7 +396,7 @@ class ScheduleActions(ft.Container):
         if self.on_bulk_fill:
             self.on_bulk_fill(e)
 
-    def _handle_file_picked(self, e: ft.FilePickerResultEvent) -> None:
+    async def _handle_file_picked(self, e: ft.FilePickerResultEvent) -> None:
         """ファイル選択時の処理。ファイルを保存し、設定を更新します。"""
         if e.files:
             try:
@@ -268,27 +408,29 @@ class ScheduleActions(ft.Container):
                 # 同名ファイル上書き保存
                 shutil.copy2(src_path, dst_path)
                 
-                set_key(ENV_PATH, "KISHAKAI_PDF_NAME", file_name)
-                self.kishakai_file_name = file_name
+                set_keys(ENV_PATH, {"KISHAKAI_PDF_NAME": file_name})
+                self._set_kishakai_file(file_name)
                 self.show_message(f"ファイルを保存しました: {file_name}")
                 
                 self.chk_kishakai.value = True
                 self.chk_kishakai.update()
                 
                 self.is_file_loaded = False 
+                with self._load_lock:
+                    self._load_signature = None
                 self._save_status(True)
-                self._load_kishakai_data(run_update=True)
+                await self._load_kishakai_data_async()
                 
             except Exception as ex:
                 logger.error(f"File Save Error: {ex}")
                 self.show_message(f"ファイル保存エラー: {ex}", ft.Colors.RED)
 
-    def _handle_kishakai_check_change(self, e: ft.ControlEvent) -> None:
+    async def _handle_kishakai_check_change(self, e: ft.ControlEvent) -> None:
         """帰社会チェックボックス変更時の処理。"""
         is_checked = self.chk_kishakai.value
         self._save_status(is_checked)
         if is_checked:
-            self._load_kishakai_data(run_update=True)
+            await self._load_kishakai_data_async()
         else:
             self._update_file_status(run_update=True)
 
@@ -300,10 +442,15 @@ class ScheduleActions(ft.Container):
         return self.chk_kishakai.value
 
     @property
-    def kishakai_dates(self) -> Set[str]:
+    def kishakai_dates(self) -> FrozenSet[str]:
         """キャッシュされている帰社会の日付セットを返します。"""
         return self.kishakai_dates_cache
 
+    @property
+    def kishakai_md_dates(self) -> FrozenSet[str]:
+        """帰社会の日付を "MM/DD" 形式に正規化したセットを返します (行ごとの照合用)。"""
+        return self._kishakai_md
+
     @property
     def is_pdf_loaded(self) -> bool:
         """互換性用プロパティ: is_file_loaded のエイリアス"""
@@ -324,21 +471,12 @@ class ScheduleActions(ft.Container):
             self.is_file_loaded = False
             return
 
-        file_path = os.path.join(self.pdf_save_dir, self.kishakai_file_name)
-        if not os.path.exists(file_path):
+        if not os.path.exists(self._file_path):
             self.is_file_loaded = False
             return
             
         try:
-            ext = os.path.splitext(self.kishakai_file_name)[1].lower()
-            if ext == ".json":
-                # JSONは年指定不要（ファイル内の日付を正とする）
-                self._load_from_json(file_path)
-            elif ext == ".pdf":
-                if get_kishakai_dates:
-                    self.kishakai_dates_cache = get_kishakai_dates(file_path, target_year)
-                else:
-                    raise ImportError("PDF module missing")
+            self._apply_kishakai_result(self._read_kishakai_file(target_year))
             
             self.is_file_loaded = True
             logger.info(f"File reloaded: {len(self.kishakai_dates_cache)} dates")
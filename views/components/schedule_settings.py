@@ -2,24 +2,45 @@
 import flet as ft
 import os
 import json
-from typing import Dict, Optional, Callable
-from dotenv import set_key
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Callable, Tuple
 from core.commons import (
     logger, ENV_PATH, CRYPTOGRAPHY_AVAILABLE, WEEKDAYS_NO_WEEKEND,
-    encrypt, decrypt
+    encrypt, decrypt_cached
 )
+from utils.env_utils import set_keys
+from utils.json_utils import dumps_compact
+
+@lru_cache(maxsize=64)
+def _std_work_minutes(std_val: str) -> int:
+    """所定稼働時間 "HHMM" を分に変換します (4桁の数値でない場合は480分)。"""
+    if len(std_val) != 4:
+        return 480
+    try:
+        return int(std_val[:2]) * 60 + int(std_val[2:])
+    except ValueError:
+        return 480
 
 class ScheduleSettings(ft.Column):
     """
     スケジュール作成画面の設定部分（ログイン情報、デフォルト値、拡張設定）を管理するコンポーネント。
+
+    入力のたびに .env を書き換えないよう、保存は SAVE_DEBOUNCE_SEC の間入力が途切れた時点で
+    まとめて1回行います。
     """
 
+    SAVE_DEBOUNCE_SEC: float = 0.3
+
     def __init__(self, page: ft.Page, on_change: Optional[Callable] = None):
         # 変数初期化（親クラスの初期化前に必要なため）
         self.page = page
         self.on_change = on_change
         self.advanced_settings_inputs: Dict[str, Dict[str, ft.Control]] = {}
+        # (曜日, 入力コントロール) の組を曜日順に保持 (保存時の走査用)
+        self._adv_items: List[Tuple[str, Dict[str, ft.Control]]] = []
         self.is_settings_expanded: bool = False
+        self._save_timer: Optional[threading.Timer] = None
         
         # 設定値のロード
         self._load_env_settings()
@@ -87,8 +108,8 @@ class ScheduleSettings(ft.Column):
 
     def _load_env_settings(self) -> None:
         """環境変数から設定を読み込みます。"""
-        self.login_id_val = decrypt(os.getenv("SCHEDULE_LOGIN_ID", ""))
-        self.login_pw_val = decrypt(os.getenv("SCHEDULE_LOGIN_PW", ""))
+        self.login_id_val = decrypt_cached(os.getenv("SCHEDULE_LOGIN_ID", ""))
+        self.login_pw_val = decrypt_cached(os.getenv("SCHEDULE_LOGIN_PW", ""))
         self.def_start_val = os.getenv("DEF_START", "0930")
         self.def_end_val = os.getenv("DEF_END", "1800")
         self.def_rest_val = os.getenv("DEF_REST", "0100")
@@ -115,28 +136,47 @@ class ScheduleSettings(ft.Column):
         self.advanced_settings_data = default_map
 
     def save_settings(self, e: Optional[ft.ControlEvent] = None) -> None:
-        """現在の設定を環境変数（.envファイル）に保存します。"""
+        """現在の設定の保存を予約し、親に変更を通知します。
+
+        .env への書き込みは連続入力が落ち着いた後に `_write_settings` でまとめて行います。
+        """
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        self._save_timer = threading.Timer(self.SAVE_DEBOUNCE_SEC, self._write_settings)
+        self._save_timer.start()
+
+        # 親に変更を通知（計算処理などが走る可能性があるため）
+        if self.on_change:
+            try:
+                self.on_change(e)
+            except Exception as ex:
+                logger.error(f"Save Error: {ex}")
+
+    def _write_settings(self) -> None:
+        """現在の設定を環境変数（.envファイル）に一括で保存します。"""
         try:
-            set_key(ENV_PATH, "DEF_START", self.input_def_start.value)
-            set_key(ENV_PATH, "DEF_END", self.input_def_end.value)
-            set_key(ENV_PATH, "DEF_REST", self.input_def_rest.value)
-            set_key(ENV_PATH, "DEF_STD_WORK", self.def_std_work_val)
+            values = {
+                "DEF_START": self.input_def_start.value,
+                "DEF_END": self.input_def_end.value,
+                "DEF_REST": self.input_def_rest.value,
+                "DEF_STD_WORK": self.def_std_work_val,
+            }
             if self.show_midnight_val:
-                set_key(ENV_PATH, "DEF_MID", self.input_def_mid.value)
+                values["DEF_MID"] = self.input_def_mid.value
             
-            set_key(ENV_PATH, "SHOW_MIDNIGHT", str(self.show_midnight_val).lower())
-            set_key(ENV_PATH, "USE_ADVANCED_SETTINGS", str(self.use_advanced_val).lower())
-            set_key(ENV_PATH, "HOLIDAY_BEHAVIOR", self.holiday_behavior_val)
+            values["SHOW_MIDNIGHT"] = str(self.show_midnight_val).lower()
+            values["USE_ADVANCED_SETTINGS"] = str(self.use_advanced_val).lower()
+            values["HOLIDAY_BEHAVIOR"] = self.holiday_behavior_val
             
             val_id = encrypt(self.input_login_id.value) if CRYPTOGRAPHY_AVAILABLE else self.input_login_id.value
             val_pw = encrypt(self.input_login_pw.value) if CRYPTOGRAPHY_AVAILABLE else self.input_login_pw.value
-            set_key(ENV_PATH, "SCHEDULE_LOGIN_ID", val_id)
-            set_key(ENV_PATH, "SCHEDULE_LOGIN_PW", val_pw)
+            values["SCHEDULE_LOGIN_ID"] = val_id
+            values["SCHEDULE_LOGIN_PW"] = val_pw
+            decrypt_cached.cache_clear()
 
-            if self.use_advanced_val and self.advanced_settings_inputs:
+            if self.use_advanced_val and self._adv_items:
                 save_list = []
-                for w in WEEKDAYS_NO_WEEKEND:
-                    inputs = self.advanced_settings_inputs[w]
+                for w, inputs in self._adv_items:
                     save_list.append({
                         "曜日": w,
                         "開始": inputs["start"].value,
@@ -146,11 +186,9 @@ class ScheduleSettings(ft.Column):
                         "在宅勤務": inputs["wfh"].value,
                         "コメント": inputs["template"].value
                     })
-                set_key(ENV_PATH, "ADVANCED_SETTINGS_JSON", json.dumps(save_list, ensure_ascii=False))
+                values["ADVANCED_SETTINGS_JSON"] = dumps_compact(save_list)
 
-            # 親に変更を通知（計算処理などが走る可能性があるため）
-            if self.on_change:
-                self.on_change(e)
+            set_keys(ENV_PATH, values)
 
         except Exception as ex:
             logger.error(f"Save Error: {ex}")
@@ -166,6 +204,7 @@ class ScheduleSettings(ft.Column):
             i_wfh = ft.Checkbox(value=data.get("在宅勤務", False), on_change=self.save_settings)
             i_template = ft.TextField(value=data.get("コメント", ""), width=150, content_padding=5, text_size=13, on_change=self.save_settings)
             self.advanced_settings_inputs[w] = {"start": i_start, "end": i_end, "rest": i_rest, "mid": i_mid, "wfh": i_wfh, "template": i_template}
+            self._adv_items.append((w, self.advanced_settings_inputs[w]))
             rows.append(ft.Row([ft.Text(w, width=50), i_start, i_end, i_rest, i_mid, i_wfh, i_template], alignment=ft.MainAxisAlignment.CENTER))
         self.container_advanced.content = ft.Column(rows, spacing=5, horizontal_alignment=ft.CrossAxisAlignment.CENTER)
 
@@ -216,6 +255,8 @@ class ScheduleSettings(ft.Column):
     @property
     def default_std_work(self): return self.input_def_std_work.value
     @property
+    def default_std_work_minutes(self) -> int: return _std_work_minutes(self.input_def_std_work.value or "")
+    @property
     def show_midnight(self): return self.show_midnight_val
     @property
     def use_advanced_settings(self): return self.use_advanced_val
\ No newline at end of file
@@ -1,12 +1,64 @@
 # v2.4 (Docstring & TypeHint applied)
 import flet as ft
+import asyncio
 import datetime
-from typing import List, Dict, Any, Optional
+import threading
+import numpy as np
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from core.commons import WORK_TYPE_OPTIONS
+from utils.date_utils import month_day_key
+
+# 集計用配列のキー -> (時キー, 分キー)
+_SUMMARY_PAIRS = {
+    "s": ("start_h", "start_m"),
+    "e": ("end_h", "end_m"),
+    "r": ("rest_h", "rest_m"),
+    "m": ("mid_h", "mid_m"),
+}
+# 行データのキー -> 集計用配列のキー
+_SUMMARY_KEY_OF = {k: arr_key for arr_key, pair in _SUMMARY_PAIRS.items() for k in pair}
+
+def _mm(h: Any, m: Any) -> int:
+    """時・分の文字列を分に変換します (どちらかが未入力、または数値でない場合は0)。"""
+    if not (h and m):
+        return 0
+    try:
+        return int(h) * 60 + int(m)
+    except ValueError:
+        return 0
+
+def _parse_work_date(work_date: str, current_year: int) -> Optional[datetime.date]:
+    """行の workDate ("YYYY/MM/DD", "YYYY-MM-DD" または "MM/DD") を日付に変換します (変換できない場合はNone)。
+
+    ゼロ埋めされた日付は ISO 形式に揃えて date.fromisoformat で変換し、
+    それ以外 (ゼロ埋めなし、月日のみ) の場合のみ strptime / int で変換します。
+    """
+    iso = work_date.replace("/", "-")
+    try:
+        return datetime.date.fromisoformat(iso)
+    except ValueError:
+        pass
+    try:
+        parts = iso.split("-")
+        if len(parts) >= 3:
+            return datetime.datetime.strptime(iso, "%Y-%m-%d").date()
+        if len(parts) == 2:
+            return datetime.date(current_year, int(parts[0]), int(parts[1]))
+    except ValueError:
+        pass
+    return None
+
+@lru_cache(maxsize=256)
+def _hhmm_min(text: str) -> int:
+    """設定値の "HHMM" 文字列を分に変換します (設定値は行をまたいで同じ値が続くため結果をキャッシュする)。"""
+    return _mm(text[:2], text[2:])
 
 class ScheduleTable(ft.Column):
     """スケジュール作成画面のテーブル（カレンダー）と集計部分を管理するコンポーネント。
 
+    入力中の集計は SUMMARY_DEBOUNCE_SEC の間にまとめ、最後の変更分だけを画面に反映します。
+
     Attributes:
         page (ft.Page): Fletのページオブジェクト。
         settings_view (Any): 設定コンポーネント（所定時間設定などへのアクセス用）。
@@ -15,6 +67,12 @@ class ScheduleTable(ft.Column):
         rows_controls (List[Dict[str, Any]]): 各行の入力コントロールへの参照リスト。
     """
 
+    SUMMARY_DEBOUNCE_SEC: float = 0.05
+    # 行内の深夜時間 (時・分) セルの位置
+    _MID_CELLS = slice(10, 12)
+    # 時・分入力欄の共通設定
+    _TF_KW: Dict[str, Any] = dict(width=40, content_padding=5, text_size=13, text_align=ft.TextAlign.CENTER, border=ft.InputBorder.NONE, filled=False, max_length=2)
+
     def __init__(self, page: ft.Page, settings_view: Any, actions_view: Any):
         """ScheduleTableコンポーネントを初期化します。
 
@@ -31,6 +89,21 @@ class ScheduleTable(ft.Column):
         self.horizontal_alignment = ft.CrossAxisAlignment.CENTER
         self.schedule_data: List[Dict[str, Any]] = [] 
         self.rows_controls: List[Dict[str, Any]] = []
+        # 再利用する行 (rows_controls と同じ並び)。深夜列は常に生成し、表示/非表示のみ切り替える
+        self._row_pool: List[ft.DataRow] = []
+        self._pool_midnight: Optional[bool] = None
+        self._mid_columns: List[ft.DataColumn] = []
+        # 集計用の配列 (行ごとの開始/終了/休憩/深夜の分と稼働フラグ)。値の変更時に更新する
+        self._arr: Dict[str, np.ndarray] = {}
+        # 集計の再計算を予約済みかどうか
+        self._summary_pending: bool = False
+        # _summary_pending の確認と更新を、イベントハンドラのスレッドと集計タスクの間で排他する
+        self._summary_lock = threading.Lock()
+        # 直近の集計で使った所定稼働 (分)。設定変更時に集計が必要かの判定に使う
+        self._summary_std_min: Optional[int] = None
+        # 各行の workDate を解析した日付と "MM/DD" (set_data 時に1回だけ解析する)
+        self._row_dates: List[Optional[datetime.date]] = []
+        self._row_md: List[Optional[str]] = []
 
         # --- UI構築 ---
         self.schedule_table = ft.DataTable(
@@ -71,10 +144,23 @@ class ScheduleTable(ft.Column):
             data (List[Dict[str, Any]]): 表示するスケジュールデータのリスト。
         """
         self.schedule_data = data
+        self._parse_row_dates()
+        self._rebuild_summary_arrays()
         self.schedule_table.visible = True
         self.summary_container.visible = True
         self.refresh_table()
 
+    def _parse_row_dates(self) -> None:
+        """schedule_data の各行の workDate を解析し、日付と "MM/DD" を保持します。
+
+        日付にできない場合 (今年が平年のときの "02/29" など) も、帰社会の照合用に
+        "MM/DD" は workDate の文字列から求めます。
+        """
+        current_year = datetime.date.today().year
+        work_dates = [row.get("workDate", "") for row in self.schedule_data]
+        self._row_dates = [_parse_work_date(w, current_year) for w in work_dates]
+        self._row_md = [f"{d.month:02d}/{d.day:02d}" if d else month_day_key(w) for d, w in zip(self._row_dates, work_dates)]
+
     def get_data(self) -> List[Dict[str, Any]]:
         """現在の編集データを返します。
 
@@ -86,59 +172,130 @@ class ScheduleTable(ft.Column):
     def update_columns(self, run_update: bool = True) -> None:
         """設定に基づいてテーブルのカラム定義を更新します。
 
-        深夜時間の表示有無などの設定変更に対応します。
+        深夜時間の表示有無などの設定変更に対応します。カラムは初回のみ生成し、
+        深夜時間の列は表示/非表示のみを切り替えます。
 
         Args:
             run_update (bool, optional): 即座にUI更新を行うかどうか。 Defaults to True.
         """
-        cols = [
-            ft.DataColumn(ft.Text("日付")), ft.DataColumn(ft.Text("曜")), ft.DataColumn(ft.Text("区分")), ft.DataColumn(ft.Text("自動入力")),
-            ft.DataColumn(ft.Text("開時")), ft.DataColumn(ft.Text("開分")), ft.DataColumn(ft.Text("終時")), ft.DataColumn(ft.Text("終分")),
-            ft.DataColumn(ft.Text("休時")), ft.DataColumn(ft.Text("休分")),
-        ]
-        if self.settings_view.show_midnight:
-            cols.extend([ft.DataColumn(ft.Text("深時")), ft.DataColumn(ft.Text("深分"))])
-        cols.extend([ft.DataColumn(ft.Text("コメント")), ft.DataColumn(ft.Text("クリア"))])
-        self.schedule_table.columns = cols
+        show_midnight = self.settings_view.show_midnight
+        if not self._mid_columns:
+            self._mid_columns = [ft.DataColumn(ft.Text("深時")), ft.DataColumn(ft.Text("深分"))]
+            self.schedule_table.columns = [
+                ft.DataColumn(ft.Text("日付")), ft.DataColumn(ft.Text("曜")), ft.DataColumn(ft.Text("区分")), ft.DataColumn(ft.Text("自動入力")),
+                ft.DataColumn(ft.Text("開時")), ft.DataColumn(ft.Text("開分")), ft.DataColumn(ft.Text("終時")), ft.DataColumn(ft.Text("終分")),
+                ft.DataColumn(ft.Text("休時")), ft.DataColumn(ft.Text("休分")),
+                *self._mid_columns,
+                ft.DataColumn(ft.Text("コメント")), ft.DataColumn(ft.Text("クリア")),
+            ]
+        for col in self._mid_columns:
+            col.visible = show_midnight
         if run_update: self.schedule_table.update()
 
     def refresh_table(self) -> None:
-        """テーブルの行コントロールを再生成して描画します。
+        """テーブルの行コントロールに `schedule_data` の内容を反映して描画します。
 
-        `schedule_data` に基づいて `DataRow` を生成し、テーブルにセットします。
+        行のコントロールは使い回し、不足分のみ生成します (深夜列の有無が変わった場合は表示のみ切り替えます)。
+        値の反映後、テーブルの更新は1回にまとめて送信します。
         """
         if not self.schedule_data: return
-        self.rows_controls = [] 
-        new_rows = []
-        for i, row in enumerate(self.schedule_data):
-            dd_type = ft.Dropdown(value=row.get("workType", "稼働"), options=[ft.dropdown.Option(o) for o in WORK_TYPE_OPTIONS], width=85, content_padding=5, text_size=13, border_color=ft.Colors.TRANSPARENT, on_change=lambda e, idx=i: self._update_row_data(idx, "workType", e.control.value))
-            btn_apply = ft.Container(content=ft.Icon(ft.Icons.KEYBOARD_DOUBLE_ARROW_RIGHT, color=ft.Colors.BLUE), tooltip="設定を自動入力", on_click=lambda e, idx=i: self.apply_row_logic(idx) or self.calculate_summary(), padding=10, ink=False)
-            
-            def mk_tf(key): return ft.TextField(value=row.get(key, ""), width=40, content_padding=5, text_size=13, text_align=ft.TextAlign.CENTER, border=ft.InputBorder.NONE, filled=False, max_length=2, on_change=lambda e, idx=i, k=key: self._update_row_data(idx, k, e.control.value))
-            tf_sh, tf_sm, tf_eh, tf_em, tf_rh, tf_rm = mk_tf("start_h"), mk_tf("start_m"), mk_tf("end_h"), mk_tf("end_m"), mk_tf("rest_h"), mk_tf("rest_m")
-            tf_cmt = ft.TextField(value=row.get("comment", ""), content_padding=5, text_size=13, border=ft.InputBorder.NONE, on_change=lambda e, idx=i: self._update_row_data(idx, "comment", e.control.value))
-            btn_clear = ft.Container(content=ft.Icon(ft.Icons.CLEAR, color=ft.Colors.RED_400), tooltip="クリア", on_click=lambda e, idx=i: self._clear_row(idx), padding=10, ink=False)
-            
-            cells = [ft.DataCell(ft.Text(row["workDate"])), ft.DataCell(ft.Text(row["youbi"])), ft.DataCell(dd_type), ft.DataCell(btn_apply), ft.DataCell(tf_sh), ft.DataCell(tf_sm), ft.DataCell(tf_eh), ft.DataCell(tf_em), ft.DataCell(tf_rh), ft.DataCell(tf_rm)]
-            if self.settings_view.show_midnight:
-                tf_mh, tf_mm = mk_tf("mid_h"), mk_tf("mid_m")
-                cells.extend([ft.DataCell(tf_mh), ft.DataCell(tf_mm)])
-            cells.extend([ft.DataCell(ft.Container(content=tf_cmt, width=600)), ft.DataCell(btn_clear)])
-            
-            bg_col = ft.Colors.WHITE
-            if row["youbi"] == "土": bg_col = ft.Colors.BLUE_50
-            elif row["youbi"] == "日" or row.get("workType") == "休日": bg_col = ft.Colors.RED_50
-            
-            ctrls = {"type": dd_type, "sh": tf_sh, "sm": tf_sm, "eh": tf_eh, "em": tf_em, "rh": tf_rh, "rm": tf_rm, "cmt": tf_cmt}
-            if self.settings_view.show_midnight: ctrls.update({"mh": tf_mh, "mm": tf_mm})
-            
+        show_midnight = self.settings_view.show_midnight
+        if self._pool_midnight != show_midnight:
+            self._set_pool_midnight(show_midnight)
+
+        n = len(self.schedule_data)
+        while len(self._row_pool) < n:
+            ctrls, data_row = self._build_row(len(self._row_pool), show_midnight)
             self.rows_controls.append(ctrls)
-            new_rows.append(ft.DataRow(cells=cells, color=bg_col))
+            self._row_pool.append(data_row)
+        del self._row_pool[n:], self.rows_controls[n:]
+
+        for i, row in enumerate(self.schedule_data):
+            self._bind_row(i, row)
         
-        self.schedule_table.rows = new_rows
+        self.schedule_table.rows = list(self._row_pool)
         self.schedule_table.update()
         self.calculate_summary()
 
+    def _set_pool_midnight(self, show_midnight: bool) -> None:
+        """生成済みの全行の深夜時間セルの表示/非表示を切り替えます (送信は呼び出し側で行います)。"""
+        for data_row in self._row_pool:
+            for cell in data_row.cells[self._MID_CELLS]:
+                cell.visible = show_midnight
+        self._pool_midnight = show_midnight
+
+    def apply_settings(self) -> None:
+        """設定の変更をテーブルに反映します。
+
+        設定のうち表示に影響するのは深夜時間の列の表示有無と所定稼働 (集計) のみのため、
+        前回の反映から変化したものだけを更新します。行の値は設定に依存しないため再バインドしません。
+        """
+        show_midnight = self.settings_view.show_midnight
+        columns_dirty = self._mid_columns[0].visible != show_midnight
+        if columns_dirty:
+            self.update_columns(run_update=False)
+        cells_dirty = bool(self._row_pool) and self._pool_midnight != show_midnight
+        if cells_dirty:
+            self._set_pool_midnight(show_midnight)
+        if columns_dirty or cells_dirty:
+            self.schedule_table.update()
+
+        if self.schedule_data and self._summary_std_min != self.settings_view.default_std_work_minutes:
+            self._request_summary()
+
+    def _build_row(self, i: int, show_midnight: bool) -> Tuple[Dict[str, Any], ft.DataRow]:
+        """i行目の入力コントロールと `DataRow` を生成します (値は `_bind_row` で設定します)。
+
+        Args:
+            i (int): 行インデックス。
+            show_midnight (bool): 深夜時間の列を表示するか (列自体は常に生成します)。
+
+        Returns:
+            Tuple[Dict[str, Any], ft.DataRow]: (入力コントロールの辞書, DataRow)
+        """
+        # イベントハンドラは共通のメソッドとし、行番号と項目キーは control.data で受け渡す
+        # Option も Flet のコントロール (1つの親にのみ属する) のため行ごとに生成する。生成は行の初回作成時のみ
+        dd_type = ft.Dropdown(options=[ft.dropdown.Option(o) for o in WORK_TYPE_OPTIONS], width=85, content_padding=5, text_size=13, border_color=ft.Colors.TRANSPARENT, data=(i, "workType"), on_change=self._on_field_change)
+        btn_apply = ft.Container(content=ft.Icon(ft.Icons.KEYBOARD_DOUBLE_ARROW_RIGHT, color=ft.Colors.BLUE), tooltip="設定を自動入力", data=i, on_click=self._on_apply_click, padding=10, ink=False)
+        
+        mk_tf = self._mk_tf
+        tf_sh, tf_sm, tf_eh, tf_em, tf_rh, tf_rm = mk_tf(i, "start_h"), mk_tf(i, "start_m"), mk_tf(i, "end_h"), mk_tf(i, "end_m"), mk_tf(i, "rest_h"), mk_tf(i, "rest_m")
+        tf_cmt = ft.TextField(content_padding=5, text_size=13, border=ft.InputBorder.NONE, data=(i, "comment"), on_change=self._on_field_change)
+        btn_clear = ft.Container(content=ft.Icon(ft.Icons.CLEAR, color=ft.Colors.RED_400), tooltip="クリア", data=i, on_click=self._on_clear_click, padding=10, ink=False)
+        
+        tf_mh, tf_mm = mk_tf(i, "mid_h"), mk_tf(i, "mid_m")
+        
+        cells = [
+            ft.DataCell(ft.Text()), ft.DataCell(ft.Text()), ft.DataCell(dd_type), ft.DataCell(btn_apply), ft.DataCell(tf_sh), ft.DataCell(tf_sm), ft.DataCell(tf_eh), ft.DataCell(tf_em), ft.DataCell(tf_rh), ft.DataCell(tf_rm),
+            ft.DataCell(tf_mh, visible=show_midnight), ft.DataCell(tf_mm, visible=show_midnight),
+            ft.DataCell(ft.Container(content=tf_cmt, width=600)), ft.DataCell(btn_clear),
+        ]
+        
+        ctrls = {"type": dd_type, "sh": tf_sh, "sm": tf_sm, "eh": tf_eh, "em": tf_em, "rh": tf_rh, "rm": tf_rm, "mh": tf_mh, "mm": tf_mm, "cmt": tf_cmt}
+        return ctrls, ft.DataRow(cells=cells)
+
+    def _mk_tf(self, i: int, key: str) -> ft.TextField:
+        """i行目の時・分入力欄 (項目キー key) を生成します。"""
+        return ft.TextField(data=(i, key), on_change=self._on_field_change, **self._TF_KW)
+
+    def _bind_row(self, i: int, row: Dict[str, Any]) -> None:
+        """i行目のコントロールに行データの値と背景色を設定します (送信は呼び出し側でまとめて行います)。"""
+        c = self.rows_controls[i]
+        data_row = self._row_pool[i]
+        data_row.cells[0].content.value = row["workDate"]
+        data_row.cells[1].content.value = row["youbi"]
+        c["type"].value = row.get("workType", "稼働")
+        c["sh"].value, c["sm"].value = row.get("start_h", ""), row.get("start_m", "")
+        c["eh"].value, c["em"].value = row.get("end_h", ""), row.get("end_m", "")
+        c["rh"].value, c["rm"].value = row.get("rest_h", ""), row.get("rest_m", "")
+        c["mh"].value, c["mm"].value = row.get("mid_h", ""), row.get("mid_m", "")
+        c["cmt"].value = row.get("comment", "")
+
+        bg_col = ft.Colors.WHITE
+        if row["youbi"] == "土": bg_col = ft.Colors.BLUE_50
+        elif row["youbi"] == "日" or row.get("workType") == "休日": bg_col = ft.Colors.RED_50
+        data_row.color = bg_col
+
     def apply_row_logic(self, idx: int) -> bool:
         """指定行に設定（デフォルト値・曜日設定・帰社会情報）を適用します。
 
@@ -150,7 +307,6 @@ class ScheduleTable(ft.Column):
         """
         row = self.schedule_data[idx]
         youbi = row["youbi"]
-        work_date = row.get("workDate", "")
         
         # 1. 設定値取得
         if self.settings_view.use_advanced_settings and youbi in self.settings_view.advanced_settings_inputs:
@@ -166,34 +322,21 @@ class ScheduleTable(ft.Column):
             if not self.actions_view.is_pdf_loaded:
                 self.actions_view.reload_pdf_dates()
 
-            if self.actions_view.kishakai_dates:
-                target_md = None
-                try:
-                    parts = work_date.replace("-", "/").split("/")
-                    if len(parts) >= 2:
-                        target_md = f"{int(parts[-2]):02d}/{int(parts[-1]):02d}"
-                except: pass
-
-                if target_md:
-                    is_match = False
-                    for k_date in self.actions_view.kishakai_dates:
-                        try:
-                            k_parts = k_date.replace("-", "/").split("/")
-                            if len(k_parts) >= 2:
-                                k_md = f"{int(k_parts[-2]):02d}/{int(k_parts[-1]):02d}"
-                                if target_md == k_md:
-                                    is_match = True
-                                    break
-                        except: continue
-
-                    if is_match:
-                        append_msg = "帰社会参加"
-                        if append_msg not in t_c:
-                            t_c = f"{t_c} {append_msg}" if t_c else append_msg
+            kishakai_md = self.actions_view.kishakai_md_dates
+            if kishakai_md:
+                if len(self._row_md) != len(self.schedule_data):
+                    self._parse_row_dates()
+                target_md = self._row_md[idx]
+                if target_md and target_md in kishakai_md:
+                    append_msg = "帰社会参加"
+                    if append_msg not in t_c:
+                        t_c = f"{t_c} {append_msg}" if t_c else append_msg
 
         # 3. データ更新
         row.update({"start_h": t_s[:2], "start_m": t_s[2:], "end_h": t_e[:2], "end_m": t_e[2:], "rest_h": t_r[:2], "rest_m": t_r[2:], "mid_h": t_m[:2], "mid_m": t_m[2:], "workType": "稼働"})
         if t_c: row["comment"] = t_c
+        # 書き込んだ文字列を再度解析せず、設定値の分をそのまま集計用配列へ反映する
+        self._set_summary_row(idx, _hhmm_min(t_s), _hhmm_min(t_e), _hhmm_min(t_r), _hhmm_min(t_m), True)
         
         # 4. UI更新
         c = self.rows_controls[idx]
@@ -221,33 +364,66 @@ class ScheduleTable(ft.Column):
 
         count = 0
         today = datetime.date.today()
-        current_year = today.year
+        if len(self._row_dates) != len(self.schedule_data):
+            self._parse_row_dates()
         
-        for i, row in enumerate(self.schedule_data):
-            w_date_str = row.get("workDate", "").replace("-", "/")
-            try:
-                parts = w_date_str.split("/")
-                if len(parts) >= 3:
-                     dt_obj = datetime.datetime.strptime(w_date_str, "%Y/%m/%d").date()
-                elif len(parts) == 2:
-                     dt_obj = datetime.date(current_year, int(parts[0]), int(parts[1]))
-                else: continue
-                
-                if dt_obj > today: continue 
-            except ValueError: continue
-
-            if row.get("workType") != "休日" and not row.get("start_h"):
-                self.apply_row_logic(i)
-                count += 1
+        # 未来日・日付不正・休日・入力済みの行を除いた対象行のみに適用する
+        targets = [
+            i for i, (row, dt_obj) in enumerate(zip(self.schedule_data, self._row_dates))
+            if dt_obj is not None and dt_obj <= today and row.get("workType") != "休日" and not row.get("start_h")
+        ]
+        for i in targets:
+            self.apply_row_logic(i)
+            count += 1
         
         if count > 0:
             self.calculate_summary()
             self.schedule_table.update()
         return count
 
+    def _on_field_change(self, e: ft.ControlEvent) -> None:
+        """行の入力コントロール変更時の処理 (control.data は (行番号, 項目キー))。"""
+        idx, key = e.control.data
+        self._update_row_data(idx, key, e.control.value)
+
+    def _on_apply_click(self, e: ft.ControlEvent) -> None:
+        """行の自動入力ボタン押下時の処理 (control.data は行番号)。"""
+        self.apply_row_logic(e.control.data)
+        self.calculate_summary()
+
+    def _on_clear_click(self, e: ft.ControlEvent) -> None:
+        """行のクリアボタン押下時の処理 (control.data は行番号)。"""
+        self._clear_row(e.control.data)
+
     def _update_row_data(self, idx: int, key: str, value: Any) -> None:
         """行データを更新し、集計を再計算します。"""
-        self.schedule_data[idx][key] = value
+        row = self.schedule_data[idx]
+        row[key] = value
+        if key == "workType":
+            self._arr["work"][idx] = value == "稼働"
+        elif key in _SUMMARY_KEY_OF:
+            arr_key = _SUMMARY_KEY_OF[key]
+            h_key, m_key = _SUMMARY_PAIRS[arr_key]
+            self._arr[arr_key][idx] = _mm(row.get(h_key), row.get(m_key))
+        self._request_summary()
+
+    def _request_summary(self) -> None:
+        """集計の再計算を予約します (予約済みなら何もしない)。"""
+        if not self.page:
+            self.calculate_summary()
+            return
+        with self._summary_lock:
+            if self._summary_pending:
+                return
+            self._summary_pending = True
+        self.page.run_task(self._run_pending_summary)
+
+    async def _run_pending_summary(self) -> None:
+        """待機後、それまでの変更をまとめて集計に反映します。"""
+        await asyncio.sleep(self.SUMMARY_DEBOUNCE_SEC)
+        # 集計中に入った変更は次の予約で反映されるよう、先にフラグを戻す
+        with self._summary_lock:
+            self._summary_pending = False
         self.calculate_summary()
 
     def _clear_row(self, idx: int) -> None:
@@ -255,6 +431,7 @@ class ScheduleTable(ft.Column):
         row = self.schedule_data[idx]
         for k in ["start_h", "start_m", "end_h", "end_m", "rest_h", "rest_m", "mid_h", "mid_m", "comment"]: row[k] = ""
         row["workType"] = "稼働"
+        self._set_summary_row(idx, 0, 0, 0, 0, True)
         c = self.rows_controls[idx]
         for k in c.values(): 
             if isinstance(k, ft.Dropdown): k.value = "稼働"
@@ -262,24 +439,50 @@ class ScheduleTable(ft.Column):
             k.update()
         self.calculate_summary()
 
+    def _rebuild_summary_arrays(self) -> None:
+        """schedule_data 全体から集計用の配列を作り直します。"""
+        n = len(self.schedule_data)
+        self._arr = {k: np.zeros(n, np.int16) for k in _SUMMARY_PAIRS}
+        self._arr["work"] = np.zeros(n, np.bool_)
+        for i in range(n):
+            self._sync_summary_row(i)
+
+    def _sync_summary_row(self, idx: int) -> None:
+        """指定行の集計用配列の値を行データから更新します。"""
+        row = self.schedule_data[idx]
+        for arr_key, (h_key, m_key) in _SUMMARY_PAIRS.items():
+            self._arr[arr_key][idx] = _mm(row.get(h_key), row.get(m_key))
+        self._arr["work"][idx] = row.get("workType") == "稼働"
+
+    def _set_summary_row(self, idx: int, s: int, e: int, r: int, m: int, work: bool) -> None:
+        """指定行の集計用配列に、解析済みの分と稼働フラグを直接書き込みます。"""
+        arr = self._arr
+        arr["s"][idx], arr["e"][idx], arr["r"][idx], arr["m"][idx] = s, e, r, m
+        arr["work"][idx] = work
+
     def calculate_summary(self) -> None:
-        """稼働時間と残業時間を再計算してUIを更新します。"""
-        total_min, count = 0, 0
-        def to_min(h, m): return (int(h) * 60 + int(m)) if (h and m) else 0
-        std_val = self.settings_view.default_std_work
-        std_min = (int(std_val[:2]) * 60 + int(std_val[2:])) if len(std_val) == 4 else 480
-        
-        for row in self.schedule_data:
-            if row.get("workType") == "稼働":
-                actual = to_min(row.get("end_h"), row.get("end_m")) - to_min(row.get("start_h"), row.get("start_m")) - to_min(row.get("rest_h"), row.get("rest_m")) - to_min(row.get("mid_h"), row.get("mid_m"))
-                if actual > 0: total_min += actual; count += 1
+        """稼働時間と残業時間を再計算してUIを更新します。
+
+        行ごとの分は値の変更時に集計用配列へ反映済みのため、ここでは配列演算のみを行います。
+        """
+        std_min = self.settings_view.default_std_work_minutes
+        self._summary_std_min = std_min
+
+        if len(self._arr.get("work", ())) != len(self.schedule_data):
+            self._rebuild_summary_arrays()
+        arr = self._arr
+        actual = arr["e"] - arr["s"] - arr["r"] - arr["m"]
+        mask = arr["work"] & (actual > 0)
+        total_min = int(actual[mask].sum())
+        count = int(mask.sum())
         
         total_std = count * std_min
         over = max(0, total_min - total_std)
+        is_over_limit = over / 60 > 40
+        txt_overtime = self.txt_summary_overtime
         self.txt_summary_work.value = f"稼働時間: {total_min/60:.2f}h"
-        self.txt_summary_overtime.value = f"残業時間: {over/60:.2f}h"
-        self.txt_summary_alert.value = "⚠️ 36提出してますか？" if (over/60 > 40) else ""
-        self.txt_summary_overtime.color = ft.Colors.RED if (over/60 > 40) else ft.Colors.BLACK
-        self.txt_summary_work.update()
-        self.txt_summary_overtime.update()
-        self.txt_summary_alert.update()
\ No newline at end of file
+        txt_overtime.value = f"残業時間: {over/60:.2f}h"
+        self.txt_summary_alert.value = "⚠️ 36提出してますか？" if is_over_limit else ""
+        txt_overtime.color = ft.Colors.RED if is_over_limit else ft.Colors.BLACK
+        # 3つのテキストは同じコンテナ内にあるため、コンテナの更新1回でまとめて送信する
+        self.summary_container.update()
\ No newline at end of file
@@ -3,14 +3,24 @@ import flet as ft
 import datetime
 import calendar
 import json
+import logging
 import os
 import traceback
+import numpy as np
+from functools import lru_cache
 from typing import Dict, Any, Optional
-from dotenv import set_key
 from core.commons import logger, ENV_PATH, APP_BUNDLE_DIR, jpholiday
+from utils.env_utils import set_keys
 # 作成したユーティリティをインポート
 from utils.json_utils import load_special_holidays, save_special_holidays
 
+@lru_cache(maxsize=32)
+def _holidays_for(year: int, month: int) -> Dict[datetime.date, str]:
+    """指定年月の祝日を {日付: 祝日名} で返します (月ごとに1回だけ jpholiday に問い合わせる)。"""
+    if not jpholiday:
+        return {}
+    return dict(jpholiday.month_holidays(year, month))
+
 class EstimateView(ft.Container):
     """稼働見込計算画面のビュークラス。
 
@@ -26,6 +36,8 @@ class EstimateView(ft.Container):
         self.page = page
         # 初期化時にJSONロードを実行
         self.special_holidays_list: list = load_special_holidays()
+        # 日付判定用 (special_holidays_list を変更した場合は作り直す)
+        self._special_set: set = set(self.special_holidays_list)
         self.est_refs: Dict[str, ft.Control] = {}
         
         self.padding = 20
@@ -124,7 +136,7 @@ class EstimateView(ft.Container):
     def handle_std_work_change(self, e: ft.ControlEvent) -> None:
         """所定労働時間の変更を処理します。"""
         self.def_std_work_val = e.control.value
-        set_key(ENV_PATH, "DEF_STD_WORK", self.def_std_work_val)
+        set_keys(ENV_PATH, {"DEF_STD_WORK": self.def_std_work_val})
         float_str = f"{self.get_std_work_hour_as_float():.2f}"
         if 'cur_daily' in self.est_refs:
             self.est_refs['cur_daily'].value = float_str; self.est_refs['cur_daily'].update(); self.calc_estimate_total('cur')
@@ -134,7 +146,7 @@ class EstimateView(ft.Container):
     def handle_estimate_holiday_change(self, e: ft.ControlEvent) -> None:
         """祝日扱いの変更を処理します。"""
         self.holiday_behavior_val = "稼働日として扱う" if e.control.value else "休日として扱う"
-        set_key(ENV_PATH, "HOLIDAY_BEHAVIOR", self.holiday_behavior_val)
+        set_keys(ENV_PATH, {"HOLIDAY_BEHAVIOR": self.holiday_behavior_val})
         self.recalc_workdays("cur")
         self.recalc_workdays("nxt")
     
@@ -150,6 +162,7 @@ class EstimateView(ft.Container):
                 if isinstance(new_data, list):
                     # データをメモリにセット
                     self.special_holidays_list = new_data
+                    self._special_set = set(new_data)
                     
                     # データをdataフォルダへ保存 (永続化)
                     if save_special_holidays(self.special_holidays_list):
@@ -204,42 +217,49 @@ class EstimateView(ft.Container):
             m = int(m_str)
             
             _, last_day = calendar.monthrange(y, m)
-            work_days = 0
             is_work_hol = self.switch_estimate_holiday.value # Trueなら祝日も稼働
+            holmap = _holidays_for(y, m)
+            # INFOログが無効な場合は、内訳ログのメッセージ組み立て自体を行わない
+            info_on = logger.isEnabledFor(logging.INFO)
             
-            logger.info(f"--- {y}年{m}月 稼働日計算開始 (祝日稼働設定: {is_work_hol}) ---")
+            if info_on:
+                logger.info("--- %d年%d月 稼働日計算開始 (祝日稼働設定: %s) ---", y, m, is_work_hol)
 
-            for d in range(1, last_day + 1):
-                dt = datetime.date(y, m, d)
-                dt_str = dt.strftime("%Y-%m-%d")
-                
-                # 1. 特別休暇リスト (JSON) の判定
-                if dt_str in self.special_holidays_list:
-                    logger.info(f"[-] {dt_str}: 特別休暇(JSON)により除外")
-                    continue
-                
-                # 2. 土日判定
-                if dt.weekday() >= 5:
-                    # 土日はログが多すぎるので通常はスキップ
-                    continue
-                
-                # 3. 祝日判定 (jpholiday)
-                if jpholiday and jpholiday.is_holiday(dt):
-                    holiday_name = jpholiday.is_holiday_name(dt)
+            # 月の全日付を配列にし、日ごとの判定をまとめて行う
+            first = np.datetime64(datetime.date(y, m, 1), "D")
+            days = first + np.arange(last_day)
+            day_strs = days.astype(str)
+
+            # 1. 特別休暇リスト (JSON) の判定
+            special = np.isin(day_strs, list(self._special_set))
+            # 2. 土日判定
+            weekday = np.is_busday(days)
+            # 3. 祝日判定 (jpholiday)
+            holiday = np.isin(days, np.array(list(holmap), dtype="datetime64[D]"))
+
+            if info_on:
+                for dt_str in day_strs[special]:
+                    logger.info("[-] %s: 特別休暇(JSON)により除外", dt_str)
+                for i in np.flatnonzero(weekday & ~special & holiday):
+                    dt_str, holiday_name = day_strs[i], holmap[datetime.date(y, m, int(i) + 1)]
                     if is_work_hol:
-                        logger.info(f"[+] {dt_str}: {holiday_name} ですが、設定により稼働日とします")
+                        logger.info("[+] %s: %s ですが、設定により稼働日とします", dt_str, holiday_name)
                     else:
-                        logger.info(f"[-] {dt_str}: {holiday_name} (祝日) のため除外")
-                        continue
-                
-                # ここまで来たら稼働日
-                work_days += 1
+                        logger.info("[-] %s: %s (祝日) のため除外", dt_str, holiday_name)
+
+            # ここまでの判定で除外されなかった日が稼働日
+            work_mask = weekday & ~special
+            if not is_work_hol:
+                work_mask &= ~holiday
+            work_days = int(work_mask.sum())
             
-            logger.info(f"=== {y}年{m}月 計算結果: {work_days}日 ===")
+            if info_on:
+                logger.info("=== %d年%d月 計算結果: %d日 ===", y, m, work_days)
 
-            self.est_refs[f"{prefix}_days"].value = str(work_days)
-            if self.est_refs[f"{prefix}_days"].page: 
-                self.est_refs[f"{prefix}_days"].update()
+            days_ref = self.est_refs[f"{prefix}_days"]
+            days_ref.value = str(work_days)
+            if days_ref.page: 
+                days_ref.update()
             self.calc_estimate_total(prefix)
             
         except Exception as e:
@@ -249,9 +269,11 @@ class EstimateView(ft.Container):
     def calc_estimate_total(self, prefix: str) -> None:
         """見込総稼働時間を再計算します。"""
         try:
-            d = float(self.est_refs[f"{prefix}_days"].value or 0)
-            h = float(self.est_refs[f"{prefix}_daily"].value or 0)
-            self.est_refs[f"{prefix}_res_total"].value = f"{d * h:.2f} H"
-            if self.est_refs[f"{prefix}_res_total"].page:
-                self.est_refs[f"{prefix}_res_total"].update()
+            refs = self.est_refs
+            d = float(refs[f"{prefix}_days"].value or 0)
+            h = float(refs[f"{prefix}_daily"].value or 0)
+            total_ref = refs[f"{prefix}_res_total"]
+            total_ref.value = f"{d * h:.2f} H"
+            if total_ref.page:
+                total_ref.update()
         except Exception: pass
\ No newline at end of file
@@ -2,18 +2,14 @@
 import flet as ft
 import datetime
 import os
-from typing import Dict, Any, Optional
-from dotenv import set_key
+from contextlib import contextmanager
+from functools import partial
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from core.commons import (
-    logger, ENV_PATH, ROOT_DIR, MODULES_AVAILABLE, CRYPTOGRAPHY_AVAILABLE,
-    encrypt, decrypt, run_main_logic, FletStatusPlaceholder
+    logger, ENV_PATH, ROOT_DIR, MODULES_AVAILABLE,
+    decrypt_cached, run_main_logic, FletStatusPlaceholder
 )
-
-try:
-    from utils.csv_handler import merge_and_save_csv
-except ImportError:
-    logger.warning("csv_handler module not found.")
-    def merge_and_save_csv(*args, **kwargs): return None
+from utils.json_utils import dumps_compact
 
 class PayslipView(ft.Container):
     """給与明細画面のビュークラス。
@@ -24,6 +20,13 @@ class PayslipView(ft.Container):
         page (ft.Page): Fletのページオブジェクト。
     """
 
+    # 明細テーブルの表示設定 (行の高さを固定し、表示範囲内の行のみ描画させる)
+    CELL_WIDTH: int = 110
+    ROW_HEIGHT: int = 36
+    TABLE_HEIGHT: int = 400
+    # 明細テーブルに最初に表示する行数 (残りは「さらに表示」で同じ行数ずつ追加する)
+    ROW_BATCH_SIZE: int = 24
+
     def __init__(self, page: ft.Page):
         super().__init__()
         self.page = page
@@ -32,8 +35,15 @@ class PayslipView(ft.Container):
         self.expand = True
         self.alignment = ft.alignment.top_center
 
-        self.payslip_id_val = decrypt(os.getenv("MY_LOGIN_ID", ""))
-        self.payslip_pw_val = decrypt(os.getenv("MY_PASSWORD", ""))
+        # True の間は個別の update() を行わず、_batch_updates の終了時にまとめて送信する
+        self._batching: bool = False
+        # 前回描画した結果のシグネチャ (同じ結果の再描画を省くため)
+        self._last_render_sig: Optional[int] = None
+        # 取得処理 (バックグラウンドスレッド) の実行中フラグ
+        self._fetching: bool = False
+
+        self.payslip_id_val = decrypt_cached(os.getenv("MY_LOGIN_ID", ""))
+        self.payslip_pw_val = decrypt_cached(os.getenv("MY_PASSWORD", ""))
 
         self.content = self._build_content()
 
@@ -45,9 +55,9 @@ class PayslipView(ft.Container):
         
         self.txt_payslip_status = ft.Text("", color=ft.Colors.BLUE)
         self.payslip_result_container = ft.Column()
-
-        def change_year_btn(delta, icon):
-            return ft.IconButton(icon, on_click=lambda e: self.change_year(delta))
+        self._build_summary_controls()
+        self._detail_host, self._detail_more, self._detail_section = self._build_table_host()
+        self._bonus_host, self._bonus_more, self._bonus_section = self._build_table_host()
 
         return ft.Column([
             ft.Text("💰 給与明細 自動取得", size=24, weight=ft.FontWeight.BOLD),
@@ -56,13 +66,13 @@ class PayslipView(ft.Container):
                     ft.Row([
                         self.input_payslip_id, 
                         self.input_payslip_pw, 
-                        change_year_btn(-1, ft.Icons.REMOVE),
+                        ft.IconButton(ft.Icons.REMOVE, on_click=partial(self._on_change_year, -1)),
                         self.input_target_year,
-                        change_year_btn(1, ft.Icons.ADD)
+                        ft.IconButton(ft.Icons.ADD, on_click=partial(self._on_change_year, 1))
                     ], alignment=ft.MainAxisAlignment.CENTER),
                     ft.Row([
-                        ft.ElevatedButton("実行 (指定年)", icon=ft.Icons.PLAY_ARROW, on_click=lambda e: self.handle_fetch_payslip(False)),
-                        ft.ElevatedButton("全期間スキャン", icon=ft.Icons.HISTORY, on_click=lambda e: self.handle_fetch_payslip(True)),
+                        ft.ElevatedButton("実行 (指定年)", icon=ft.Icons.PLAY_ARROW, on_click=partial(self._on_fetch_click, False)),
+                        ft.ElevatedButton("全期間スキャン", icon=ft.Icons.HISTORY, on_click=partial(self._on_fetch_click, True)),
                     ], alignment=ft.MainAxisAlignment.CENTER),
                     self.txt_payslip_status
                 ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=15),
@@ -72,6 +82,18 @@ class PayslipView(ft.Container):
             self.payslip_result_container
         ], scroll=ft.ScrollMode.AUTO, horizontal_alignment=ft.CrossAxisAlignment.CENTER, expand=True)
 
+    def _on_change_year(self, delta: int, e: ft.ControlEvent) -> None:
+        """年増減ボタンのクリックハンドラです。"""
+        self.change_year(delta)
+
+    def _on_change_year_and_fetch(self, delta: int, e: ft.ControlEvent) -> None:
+        """サマリーヘッダーの前年/翌年ボタンのクリックハンドラです。"""
+        self.change_year_and_fetch(delta)
+
+    def _on_fetch_click(self, is_full_scan: bool, e: ft.ControlEvent) -> None:
+        """実行/全期間スキャンボタンのクリックハンドラです。"""
+        self.handle_fetch_payslip(is_full_scan)
+
     def change_year(self, delta: int) -> None:
         """対象年を変更します。
 
@@ -96,10 +118,14 @@ class PayslipView(ft.Container):
     def handle_fetch_payslip(self, is_full_scan: bool) -> None:
         """給与明細データを取得するメイン処理を実行します。
 
+        Webからの取得は時間がかかるため、入力チェック後の処理はバックグラウンドスレッドで行います。
+        実行中に再度呼ばれた場合は何もしません。
+
         Args:
             is_full_scan (bool): 全期間取得を行う場合はTrue。
         """
         if not MODULES_AVAILABLE: return 
+        if self._fetching: return
         lid, lpw = self.input_payslip_id.value, self.input_payslip_pw.value
         if not lid or not lpw: 
             self.input_payslip_id.error_text = "ID未入力" if not lid else None
@@ -113,47 +139,98 @@ class PayslipView(ft.Container):
 
         ph = FletStatusPlaceholder(self.txt_payslip_status, self.page)
         ph.write("取得処理を開始します...")
-        
+
+        self._fetching = True
+        if self.page:
+            self.page.run_thread(self._do_fetch, lid, lpw, target_year, is_full_scan, ph)
+        else:
+            self._do_fetch(lid, lpw, target_year, is_full_scan, ph)
+
+    def _do_fetch(self, lid: str, lpw: str, target_year: int, is_full_scan: bool, ph: Any) -> None:
+        """取得・保存・描画を行います (バックグラウンドスレッドで実行)。
+
+        Args:
+            lid (str): ログインID。
+            lpw (str): パスワード。
+            target_year (int): 対象年。
+            is_full_scan (bool): 全期間取得を行う場合はTrue。
+            ph (Any): ステータス表示用のプレースホルダーオブジェクト。
+        """
         try:
             success, res = run_main_logic(lid, lpw, target_year, is_full_scan, ROOT_DIR, ENV_PATH, ph)
             if success:
-                val_id = encrypt(lid) if CRYPTOGRAPHY_AVAILABLE else lid
-                val_pw = encrypt(lpw) if CRYPTOGRAPHY_AVAILABLE else lpw
-                set_key(ENV_PATH, "MY_LOGIN_ID", val_id)
-                set_key(ENV_PATH, "MY_PASSWORD", val_pw)
-                
-                self.render_result(res, target_year)
-                self.save_data_automatically(res, ph)
-                
-                ph.success("取得・保存完了")
+                # 認証情報と新規行のCSV保存は run_main_logic 側で済んでいるため、ここでは描画のみ行う
+                with self._batch_updates(ph):
+                    self.render_result(res, target_year)
+                    ph.success("取得・保存完了")
             else:
                 ph.error(f"失敗: {res.get('error')}")
         except Exception as ex:
             ph.error(f"実行エラー: {ex}")
+        finally:
+            self._fetching = False
 
-    def save_data_automatically(self, res: Dict[str, Any], ph: Any) -> None:
-        """取得したデータを既存CSVとマージして保存します。
+    @contextmanager
+    def _batch_updates(self, ph: Any) -> Iterator[None]:
+        """ブロック内の画面変更を、終了時の page.update() 1回でまとめて送信します。
 
         Args:
-            res (Dict[str, Any]): 取得結果データ。
-            ph (Any): ステータス表示用のプレースホルダーオブジェクト。
+            ph (Any): ステータス表示用のプレースホルダーオブジェクト (ブロック内の表示更新を保留する)。
         """
+        self._batching = True
+        ph.deferred = True
         try:
-            new_data = res.get("final_data_ui", [])
-            if new_data:
-                csv_filename = "年間サマリー_全期間.csv"
-                key_name = "年月日"
-                merge_and_save_csv(new_data, ROOT_DIR, csv_filename, key_name)
-
-            new_bonus = res.get("bonus_data_ui", [])
-            if new_bonus:
-                csv_filename = "年間賞与_全期間.csv"
-                key_name = "支給日"
-                merge_and_save_csv(new_bonus, ROOT_DIR, csv_filename, key_name)
+            yield
+        finally:
+            self._batching = False
+            ph.deferred = False
+            if self.page:
+                self.page.update()
 
-        except Exception as ex:
-            logger.error(f"自動保存エラー: {ex}")
-            ph.warning(f"データ表示は成功しましたが、CSV保存に失敗しました: {ex}")
+    def _build_summary_controls(self) -> None:
+        """サマリー部分 (年切替ヘッダー・指標カード) のコントロールを生成します。
+
+        描画のたびに作り直さず、render_result では表示値のみを書き換えます。
+        """
+        def make_metric_card(title: str, icon: str, color: str) -> ft.Container:
+            """指標カードを作成し、タイトル・値のテキストを self._metric_texts に登録するヘルパー関数。"""
+            txt_title = ft.Text(title, size=14, color=ft.Colors.GREY_700)
+            txt_value = ft.Text("", size=20, weight=ft.FontWeight.BOLD, color=ft.Colors.BLACK)
+            self._metric_texts.append((txt_title, txt_value))
+            return ft.Container(
+                content=ft.Column([
+                    ft.Icon(icon, color=color, size=30),
+                    txt_title,
+                    txt_value,
+                ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+                padding=15, bgcolor=ft.Colors.WHITE, border_radius=10,
+                border=ft.border.all(1, ft.Colors.GREY_200), width=180 
+            )
+
+        # (タイトル, 値) のテキスト。並びは render_result で設定する値の順と同じ
+        self._metric_texts: List[Tuple[ft.Text, ft.Text]] = []
+        cards = [
+            make_metric_card("総支給 (暦年+賞与)", ft.Icons.MONEY, ft.Colors.GREEN),
+            make_metric_card("差引支給 (暦年+賞与)", ft.Icons.ACCOUNT_BALANCE_WALLET, ft.Colors.BLUE),
+            make_metric_card("賞与合計 (暦年)", ft.Icons.CARD_GIFTCARD, ft.Colors.PURPLE), 
+            make_metric_card("総時間外 (暦年)", ft.Icons.ACCESS_TIME, ft.Colors.ORANGE),
+            make_metric_card("年度時間外", ft.Icons.TIMELAPSE, ft.Colors.RED),
+            make_metric_card("有給残 (最新)", ft.Icons.BEACH_ACCESS, ft.Colors.CYAN),
+        ]
+        self._metric_cards_row = ft.Row(cards, alignment=ft.MainAxisAlignment.CENTER, wrap=True, spacing=20, run_spacing=20)
+
+        self._btn_prev_year = ft.IconButton(
+            icon=ft.Icons.CHEVRON_LEFT, 
+            icon_size=30,
+            on_click=partial(self._on_change_year_and_fetch, -1)
+        )
+        self._txt_summary_title = ft.Text("", size=20, weight=ft.FontWeight.BOLD)
+        self._btn_next_year = ft.IconButton(
+            icon=ft.Icons.CHEVRON_RIGHT, 
+            icon_size=30,
+            on_click=partial(self._on_change_year_and_fetch, 1)
+        )
+        self._summary_header_row = ft.Row([self._btn_prev_year, self._txt_summary_title, self._btn_next_year], alignment=ft.MainAxisAlignment.CENTER)
 
     def render_result(self, res: Dict[str, Any], target_year: int) -> None:
         """取得結果を画面にレンダリングします。
@@ -162,70 +239,53 @@ class PayslipView(ft.Container):
             res (Dict[str, Any]): 取得結果データ。
             target_year (int): 対象年。
         """
+        sig = self._render_signature(res, target_year)
+        if sig is not None and sig == self._last_render_sig and self.payslip_result_container.controls:
+            return
+        self._last_render_sig = sig
+
         self.payslip_result_container.controls.clear()
+
+        # 明細・賞与がともに空 (範囲外の年など) の場合はカード類を組み立てない
+        # (summary_data_rekigun は成功時に常に合計値が入るため判定には使わない)
+        if not res.get("final_data_ui") and not res.get("bonus_data_ui"):
+            self.payslip_result_container.controls.append(ft.Text("データがありません", color=ft.Colors.GREY))
+            if not self._batching:
+                self.payslip_result_container.update()
+            return
         
         summary = res.get("summary_data_rekigun", {})
         nendo_ot = res.get("summary_nendo_overtime", 0.0)
         
-        def make_metric_card(title: str, value: Any, icon: str, color: str) -> ft.Container:
-            """指標カードを作成するヘルパー関数。"""
-            return ft.Container(
-                content=ft.Column([
-                    ft.Icon(icon, color=color, size=30),
-                    ft.Text(title, size=14, color=ft.Colors.GREY_700),
-                    ft.Text(str(value), size=20, weight=ft.FontWeight.BOLD, color=ft.Colors.BLACK),
-                ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
-                padding=15, bgcolor=ft.Colors.WHITE, border_radius=10,
-                border=ft.border.all(1, ft.Colors.GREY_200), width=180 
-            )
-        
         fmt_money = lambda x: f"{x:,} 円" if isinstance(x, (int, float)) else str(x)
         fmt_time = lambda x: f"{x:.2f} H" if isinstance(x, float) else str(x)
 
-        cards = [
-            make_metric_card("総支給 (暦年+賞与)", fmt_money(summary.get('total_pay', 0)), ft.Icons.MONEY, ft.Colors.GREEN),
-            make_metric_card("差引支給 (暦年+賞与)", fmt_money(summary.get('total_net_pay', 0)), ft.Icons.ACCOUNT_BALANCE_WALLET, ft.Colors.BLUE),
-            make_metric_card("賞与合計 (暦年)", fmt_money(summary.get('total_bonus', 0)), ft.Icons.CARD_GIFTCARD, ft.Colors.PURPLE), 
-            make_metric_card("総時間外 (暦年)", fmt_time(summary.get('total_overtime', 0.0)), ft.Icons.ACCESS_TIME, ft.Colors.ORANGE),
-            make_metric_card(f"年度時間外 ({target_year}/4~)", fmt_time(nendo_ot), ft.Icons.TIMELAPSE, ft.Colors.RED),
-            make_metric_card("有給残 (最新)", f"{summary.get('latest_paid_leave_remaining_days')} 日", ft.Icons.BEACH_ACCESS, ft.Colors.CYAN),
+        values = [
+            fmt_money(summary.get('total_pay', 0)),
+            fmt_money(summary.get('total_net_pay', 0)),
+            fmt_money(summary.get('total_bonus', 0)),
+            fmt_time(summary.get('total_overtime', 0.0)),
+            fmt_time(nendo_ot),
+            f"{summary.get('latest_paid_leave_remaining_days')} 日",
         ]
-        
-        header_row = ft.Row([
-            ft.IconButton(
-                icon=ft.Icons.CHEVRON_LEFT, 
-                icon_size=30,
-                tooltip=f"{target_year-1}年へ",
-                on_click=lambda e: self.change_year_and_fetch(-1)
-            ),
-            ft.Text(f"📊 {target_year}年 サマリー", size=20, weight=ft.FontWeight.BOLD),
-            ft.IconButton(
-                icon=ft.Icons.CHEVRON_RIGHT, 
-                icon_size=30,
-                tooltip=f"{target_year+1}年へ",
-                on_click=lambda e: self.change_year_and_fetch(1)
-            ),
-        ], alignment=ft.MainAxisAlignment.CENTER)
+        for (_, txt_value), value in zip(self._metric_texts, values):
+            txt_value.value = value
+        self._metric_texts[4][0].value = f"年度時間外 ({target_year}/4~)"
+
+        self._btn_prev_year.tooltip = f"{target_year-1}年へ"
+        self._txt_summary_title.value = f"📊 {target_year}年 サマリー"
+        self._btn_next_year.tooltip = f"{target_year+1}年へ"
 
         self.payslip_result_container.controls.append(ft.Container(height=20))
-        self.payslip_result_container.controls.append(header_row)
-        self.payslip_result_container.controls.append(ft.Row(cards, alignment=ft.MainAxisAlignment.CENTER, wrap=True, spacing=20, run_spacing=20))
+        self.payslip_result_container.controls.append(self._summary_header_row)
+        self.payslip_result_container.controls.append(self._metric_cards_row)
         self.payslip_result_container.controls.append(ft.Divider())
 
         data_ui = res.get("final_data_ui") 
         if data_ui:
-            keys = list(data_ui[0].keys())
-            columns = [ft.DataColumn(ft.Text(k)) for k in keys]
-            
-            rows = []
-            for item in data_ui:
-                cells = [ft.DataCell(ft.Text(str(item.get(k, "")))) for k in keys]
-                rows.append(ft.DataRow(cells=cells))
-            
-            dt = ft.DataTable(columns=columns, rows=rows, border=ft.border.all(1, ft.Colors.GREY_300))
-            
             self.payslip_result_container.controls.append(ft.Text("詳細データ", size=18, weight=ft.FontWeight.BOLD))
-            self.payslip_result_container.controls.append(ft.Row([dt], scroll=ft.ScrollMode.ALWAYS))
+            self._fill_data_table(self._detail_host, self._detail_more, data_ui)
+            self.payslip_result_container.controls.append(self._detail_section)
 
         bonus_data = res.get("bonus_data_ui")
         if bonus_data:
@@ -233,17 +293,96 @@ class PayslipView(ft.Container):
             self.payslip_result_container.controls.append(ft.Text("賞与データ", size=18, weight=ft.FontWeight.BOLD))
             
             if len(bonus_data) > 0:
-                b_keys = list(bonus_data[0].keys())
-                b_columns = [ft.DataColumn(ft.Text(k)) for k in b_keys]
-                
-                b_rows = []
-                for item in bonus_data:
-                    b_cells = [ft.DataCell(ft.Text(str(item.get(k, "")))) for k in b_keys]
-                    b_rows.append(ft.DataRow(cells=b_cells))
-                
-                dt_bonus = ft.DataTable(columns=b_columns, rows=b_rows, border=ft.border.all(1, ft.Colors.GREY_300))
-                self.payslip_result_container.controls.append(ft.Row([dt_bonus], scroll=ft.ScrollMode.ALWAYS))
+                self._fill_data_table(self._bonus_host, self._bonus_more, bonus_data)
+                self.payslip_result_container.controls.append(self._bonus_section)
             else:
                  self.payslip_result_container.controls.append(ft.Text("（対象年の賞与データはありません）", color=ft.Colors.GREY))
 
-        self.payslip_result_container.update()
\ No newline at end of file
+        if not self._batching:
+            self.payslip_result_container.update()
+
+    def _render_signature(self, res: Dict[str, Any], target_year: int) -> Optional[int]:
+        """描画内容を決める値 (対象年・サマリー・明細) のハッシュ値を返します。
+
+        Args:
+            res (Dict[str, Any]): 取得結果データ。
+            target_year (int): 対象年。
+
+        Returns:
+            Optional[int]: ハッシュ値。JSON化できない値を含む場合はNone (常に再描画する)。
+        """
+        try:
+            return hash((target_year, dumps_compact([
+                res.get("summary_data_rekigun"), res.get("summary_nendo_overtime"),
+                res.get("final_data_ui"), res.get("bonus_data_ui"),
+            ])))
+        except (TypeError, ValueError):
+            return None
+
+    def _build_table_host(self) -> Tuple[ft.Row, ft.ElevatedButton, ft.Column]:
+        """明細テーブルを載せる横スクロール領域と「さらに表示」ボタンを生成します (描画間で使い回す)。
+
+        Returns:
+            Tuple[ft.Row, ft.ElevatedButton, ft.Column]: (スクロール領域, 「さらに表示」ボタン, 両者をまとめたセクション)
+        """
+        host = ft.Row([], scroll=ft.ScrollMode.ALWAYS)
+        btn_more = ft.ElevatedButton("さらに表示", icon=ft.Icons.EXPAND_MORE, on_click=self._on_show_more_click)
+        section = ft.Column([host, btn_more], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+        return host, btn_more, section
+
+    def _fill_data_table(self, host: ft.Row, btn_more: ft.ElevatedButton, data: List[Dict[str, Any]]) -> None:
+        """明細データの表を作成し、スクロール領域の中身を差し替えます。
+
+        ヘッダー行を固定し、本体は行の高さを固定した ListView で表示します。
+        表示範囲外の行はクライアント側で描画されないため、行数が多くても初期表示が重くなりません。
+        最初は ROW_BATCH_SIZE 行のみ作成し、残りは「さらに表示」ボタンで追加します。
+
+        Args:
+            host (ft.Row): 表を載せる横スクロール領域。
+            btn_more (ft.ElevatedButton): この表の「さらに表示」ボタン。
+            data (List[Dict[str, Any]]): 表示するデータ (先頭行のキーを列とする)。
+        """
+        keys = tuple(data[0])
+        w = self.CELL_WIDTH
+
+        header = ft.Row([ft.Text(k, width=w, weight=ft.FontWeight.BOLD, no_wrap=True) for k in keys], spacing=0)
+        body = ft.ListView(item_extent=self.ROW_HEIGHT)
+        # 表示状態 (元データ・表示済み行数) はボタンの data に持たせる
+        btn_more.data = {"rows": data, "keys": keys, "body": body, "pos": 0}
+        self._append_row_batch(btn_more, self.ROW_BATCH_SIZE, run_update=False)
+
+        host.controls = [ft.Container(
+            content=ft.Column([header, ft.Divider(height=1), body], spacing=0),
+            width=w * len(keys) + 20, padding=ft.padding.symmetric(horizontal=10, vertical=5),
+            border=ft.border.all(1, ft.Colors.GREY_300)
+        )]
+
+    def _on_show_more_click(self, e: ft.ControlEvent) -> None:
+        """「さらに表示」ボタン押下時の処理。"""
+        self._append_row_batch(e.control, self.ROW_BATCH_SIZE)
+
+    def _append_row_batch(self, btn_more: ft.ElevatedButton, n: int, run_update: bool = True) -> None:
+        """未表示の行を最大 n 行、表の末尾に追加します。
+
+        Args:
+            btn_more (ft.ElevatedButton): 対象の表の「さらに表示」ボタン (data に表示状態を持つ)。
+            n (int): 追加する最大行数。
+            run_update (bool, optional): 表とボタンのみを即時更新するか。 Defaults to True.
+        """
+        state = btn_more.data
+        rows, keys, body, start = state["rows"], state["keys"], state["body"], state["pos"]
+        end = min(start + n, len(rows))
+        w = self.CELL_WIDTH
+
+        # 行のキー順が列と同じ場合 (通常は全行同じ) はキーを引かずに値を順に使う
+        body.controls.extend(
+            ft.Row([ft.Text(str(v), width=w, no_wrap=True) for v in (item.values() if tuple(item) == keys else (item.get(k, "") for k in keys))], spacing=0)
+            for item in rows[start:end]
+        )
+        state["pos"] = end
+        body.height = min(self.TABLE_HEIGHT, self.ROW_HEIGHT * len(body.controls))
+        btn_more.visible = end < len(rows)
+
+        if run_update:
+            body.update()
+            btn_more.update()
\ No newline at end of file
@@ -1,6 +1,8 @@
 # Version: 1.9 (Refactor: Extract ScheduleTable)
 import flet as ft
-from typing import Optional
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
 from core.commons import (
     ROOT_DIR, MODULES_AVAILABLE, CODE_TO_NAME, WORK_TYPE_MAP_REVERSE, ScheduleHandler
 )
@@ -10,6 +12,31 @@ from views.components.schedule_settings import ScheduleSettings
 from views.components.schedule_actions import ScheduleActions
 from views.components.schedule_table import ScheduleTable
 
+_WEEKEND = frozenset(("土", "日"))
+
+def _year_from_workdate(work_date: str) -> Optional[int]:
+    """workDate ("YYYY/MM/DD" または "YYYY-MM-DD") の先頭4桁から年を取り出します (年で始まらない場合はNone)。"""
+    head = work_date[:4]
+    return int(head) if len(head) == 4 and head.isdigit() else None
+
+def _apply_work_type_names(rows: List[Dict[str, Any]], is_h_mode: bool) -> None:
+    """取得した行の勤務区分コードを画面表示用の名称に置き換えます。
+
+    未設定コード("99")は、土日 (と祝日を休日扱いにする場合の祝日) を「休日」、それ以外を「稼働」とします。
+
+    Args:
+        rows (List[Dict[str, Any]]): サーバーから取得した行データ (直接書き換えます)。
+        is_h_mode (bool): 祝日を休日として扱う場合はTrue。
+    """
+    code_to_name = CODE_TO_NAME.get
+    for row in rows:
+        wt = row.get("workType", "99")
+        if wt == "99":
+            is_hol = row["youbi"] in _WEEKEND or (is_h_mode and row.get("shukujitsu_bool", False))
+            row["workType"] = "休日" if is_hol else "稼働"
+        else:
+            row["workType"] = code_to_name(wt, wt)
+
 class ScheduleView(ft.Container):
     """勤務表作成画面のビュークラス。
     
@@ -17,10 +44,18 @@ class ScheduleView(ft.Container):
           Viewはコンポーネントの配置とイベント仲介に専念。
     """
 
+    # ログイン済みハンドラを使い回す時間 (秒)。サーバー側のセッション切れより十分短くする
+    HANDLER_TTL_SEC = 300
+
     def __init__(self, page: ft.Page):
         super().__init__()
         self.page = page
         self.padding = 10
+
+        # ログイン済みの ScheduleHandler (ハンドラ, 有効期限, ログイン情報)。取得→登録で再ログインしないため
+        self._handler_cache: Optional[Tuple[Any, float, Tuple[str, str]]] = None
+        # ハンドラ (セッション) を同時に複数の処理から使わないためのロック
+        self._handler_lock = threading.Lock()
         self.expand = True
         self.alignment = ft.alignment.top_center
 
@@ -56,12 +91,54 @@ class ScheduleView(ft.Container):
             self.page.snack_bar.open = True
             self.page.update()
 
+    # --- セッション管理 ---
+
+    def _get_handler(self) -> Tuple[Optional[Any], str, bool]:
+        """ログイン済みの ScheduleHandler を返します (_handler_lock を保持した状態で呼び出すこと)。
+
+        有効期限内かつログイン情報が同じであればキャッシュを返し、それ以外は新しくログインします。
+
+        Returns:
+            Tuple[Optional[Any], str, bool]: (ハンドラ (ログイン失敗時はNone), メッセージ, キャッシュを使ったか)。
+        """
+        creds = (self.settings_view.login_id, self.settings_view.login_pw)
+        if self._handler_cache is not None:
+            handler, expires_at, cached_creds = self._handler_cache
+            if cached_creds == creds and time.monotonic() < expires_at:
+                return handler, "ログイン済み", True
+            self._drop_handler()
+
+        handler = ScheduleHandler(ROOT_DIR)
+        cached = False
+        try:
+            suc, msg = handler.login(*creds)
+            if not suc:
+                return None, msg, False
+            self._handler_cache = (handler, time.monotonic() + self.HANDLER_TTL_SEC, creds)
+            cached = True
+            return handler, msg, False
+        finally:
+            # ログイン失敗・例外時はキャッシュしないハンドラを閉じる
+            if not cached:
+                handler.close()
+
+    def _drop_handler(self) -> None:
+        """キャッシュしたハンドラを閉じて破棄します (_handler_lock を保持した状態で呼び出すこと)。"""
+        if self._handler_cache is not None:
+            handler = self._handler_cache[0]
+            self._handler_cache = None
+            handler.close()
+
+    def release_session(self) -> None:
+        """キャッシュしたログインセッションを閉じます (タブ切り替え・アプリ終了時に呼び出します)。"""
+        with self._handler_lock:
+            self._drop_handler()
+
     # --- イベントハンドリング ---
 
     def handle_settings_change(self, e) -> None:
-        """設定が変更されたらテーブルのカラム定義などを更新"""
-        self.table_view.update_columns()
-        self.table_view.refresh_table()
+        """設定が変更されたら、テーブルの表示に影響する差分 (深夜列・集計) のみを反映"""
+        self.table_view.apply_settings()
 
     def handle_fetch_data(self, e: Optional[ft.ControlEvent] = None) -> None:
         """Webからデータを取得し、テーブルにセットする"""
@@ -71,20 +148,20 @@ class ScheduleView(ft.Container):
         
         self.show_message("データ取得中...")
         try:
-            with ScheduleHandler(ROOT_DIR) as handler:
-                suc, msg = handler.login(self.settings_view.login_id, self.settings_view.login_pw)
-                if not suc: return self.show_message(f"失敗: {msg}", ft.Colors.RED)
+            with self._handler_lock:
+                handler, msg, reused = self._get_handler()
+                if handler is None: return self.show_message(f"失敗: {msg}", ft.Colors.RED)
                 
                 suc, msg, data = handler.get_current_data()
+                if reused and not (suc and data):
+                    # 使い回したセッションが切れていた可能性があるため、ログインし直して1回だけ再取得する
+                    self._drop_handler()
+                    handler, msg, _ = self._get_handler()
+                    if handler is None: return self.show_message(f"失敗: {msg}", ft.Colors.RED)
+                    suc, msg, data = handler.get_current_data()
                 if suc:
                     # 休日設定などを反映
-                    is_h_mode = (self.settings_view.holiday_behavior == "休日として扱う")
-                    for row in data:
-                        if row.get("workType", "99") == "99":
-                            is_hol = row["youbi"] in ["土", "日"] or (is_h_mode and row.get("shukujitsu_bool", False))
-                            row["workType"] = "休日" if is_hol else "稼働"
-                        else:
-                            row["workType"] = CODE_TO_NAME.get(row.get("workType"), row.get("workType"))
+                    _apply_work_type_names(data, self.settings_view.holiday_behavior == "休日として扱う")
                     
                     # テーブルにデータを渡す
                     self.table_view.set_data(data)
@@ -94,16 +171,14 @@ class ScheduleView(ft.Container):
                     
                     # PDF連携のために年をリロード
                     if self.actions_view.is_kishakai_mode and data:
-                        try:
-                            yd_str = data[0]["workDate"]
-                            parts = yd_str.replace("-", "/").split("/")
-                            if len(parts) >= 1 and len(parts[0]) == 4:
-                                self.actions_view.reload_pdf_dates(int(parts[0]))
-                        except:
-                            pass
+                        year = _year_from_workdate(data[0].get("workDate", ""))
+                        if year is not None:
+                            self.actions_view.reload_pdf_dates(year)
                 else: 
+                    self._drop_handler()
                     self.show_message(f"失敗: {msg}", ft.Colors.RED)
         except Exception as ex: 
+            self.release_session()
             self.show_message(f"エラー: {ex}", ft.Colors.RED)
 
     def handle_bulk_fill(self, e: ft.ControlEvent) -> None:
@@ -113,13 +188,9 @@ class ScheduleView(ft.Container):
              # 現在のデータから年を取得してリロードを試みる
              current_data = self.table_view.get_data()
              if current_data:
-                try:
-                     yd_str = current_data[0]["workDate"]
-                     parts = yd_str.replace("-", "/").split("/")
-                     if len(parts) >= 1 and len(parts[0]) == 4:
-                        self.actions_view.reload_pdf_dates(int(parts[0]))
-                except:
-                    pass
+                year = _year_from_workdate(current_data[0].get("workDate", ""))
+                if year is not None:
+                    self.actions_view.reload_pdf_dates(year)
 
         # テーブル側の一括入力メソッドを実行
         count = self.table_view.bulk_fill()
@@ -136,11 +207,25 @@ class ScheduleView(ft.Container):
         current_data = self.table_view.get_data()
         if not current_data: return
         
-        sub_data = [r.copy() for r in current_data]
-        for r in sub_data: r["workType"] = WORK_TYPE_MAP_REVERSE.get(r.get("workType", "稼働"), "99")
+        # 送信用に workType のみコードに置き換えた行を作る (画面側のデータは書き換えない)
+        to_code = WORK_TYPE_MAP_REVERSE.get
+        sub_data = [{**r, "workType": to_code(r.get("workType", "稼働"), "99")} for r in current_data]
         try:
-            with ScheduleHandler(ROOT_DIR) as handler:
-                if not handler.login(self.settings_view.login_id, self.settings_view.login_pw)[0]: return self.show_message("ログイン失敗", ft.Colors.RED)
+            with self._handler_lock:
+                handler, _, reused = self._get_handler()
+                if handler is None: return self.show_message("ログイン失敗", ft.Colors.RED)
+
+                # 入力チェックのエラーはセッションと無関係なため、キャッシュは破棄しない
+                error_msg = handler.check_input(sub_data)
+                if error_msg: return self.show_message(f"登録失敗: {error_msg}", ft.Colors.RED)
+
+                # 使い回すセッションは送信前に有効か確認し、切れていればログインし直す
+                if reused and not handler.is_session_alive():
+                    self._drop_handler()
+                    handler = self._get_handler()[0]
+                    if handler is None: return self.show_message("ログイン失敗", ft.Colors.RED)
+
+                # 登録は再送できないため、失敗時はセッションを破棄するだけで自動の再試行はしない
                 suc, msg, latest = handler.update_schedule(sub_data)
                 if suc:
                     def close_dialog(e):
@@ -154,13 +239,12 @@ class ScheduleView(ft.Container):
                     self.page.open(dlg)
 
                     if latest:
-                        is_h = (self.settings_view.holiday_behavior == "休日として扱う")
-                        for r in latest:
-                            if r.get("workType") == "99":
-                                is_hol = r["youbi"] in ["土", "日"] or (is_h and r.get("shukujitsu_bool", False))
-                                r["workType"] = "休日" if is_hol else "稼働"
-                            else: r["workType"] = CODE_TO_NAME.get(r.get("workType"), r.get("workType"))
+                        _apply_work_type_names(latest, self.settings_view.holiday_behavior == "休日として扱う")
                         
                         self.table_view.set_data(latest)
-                else: self.show_message(f"登録失敗: {msg}", ft.Colors.RED)
-        except Exception as ex: self.show_message(f"登録エラー: {ex}", ft.Colors.RED)
\ No newline at end of file
+                else:
+                    self._drop_handler()
+                    self.show_message(f"登録失敗: {msg}", ft.Colors.RED)
+        except Exception as ex:
+            self.release_session()
+            self.show_message(f"登録エラー: {ex}", ft.Colors.RED)
\ No newline at end of file